@@ -0,0 +1,20 @@
+"""job_postings.content_hash
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("job_postings", sa.Column("content_hash", sa.String(length=64), nullable=True))
+
+def downgrade():
+    op.drop_column("job_postings", "content_hash")
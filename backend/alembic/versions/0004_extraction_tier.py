@@ -0,0 +1,20 @@
+"""job_postings.extraction_tier
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("job_postings", sa.Column("extraction_tier", sa.String(length=16), nullable=True))
+
+def downgrade():
+    op.drop_column("job_postings", "extraction_tier")
@@ -0,0 +1,20 @@
+"""job_postings.description_clean
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("job_postings", sa.Column("description_clean", sa.Text(), nullable=True))
+
+def downgrade():
+    op.drop_column("job_postings", "description_clean")
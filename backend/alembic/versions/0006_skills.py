@@ -0,0 +1,36 @@
+"""skills + job_skills
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "skills",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("canonical_name", sa.String(length=128), nullable=False),
+    )
+    op.create_index("ux_skills_canonical_name", "skills", ["canonical_name"], unique=True)
+
+    op.create_table(
+        "job_skills",
+        sa.Column("job_posting_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("skill_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_job_skills_skill_id", "job_skills", ["skill_id"])
+
+def downgrade():
+    op.drop_index("ix_job_skills_skill_id", table_name="job_skills")
+    op.drop_table("job_skills")
+    op.drop_index("ux_skills_canonical_name", table_name="skills")
+    op.drop_table("skills")
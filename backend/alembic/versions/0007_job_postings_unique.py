@@ -0,0 +1,48 @@
+"""job_postings unique (source, company_name, external_id) + source_updated_at
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("job_postings", sa.Column("source_updated_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Earlier discovery passes could race and insert the same posting twice.
+    # Keep the most useful copy (extracted, then most recently extracted,
+    # then oldest) so the unique index can be built.
+    op.execute("""
+        DELETE FROM job_postings jp
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY source, company_name, external_id
+                ORDER BY (status = 'extracted') DESC, extracted_at DESC NULLS LAST, discovered_at
+            ) AS rn
+            FROM job_postings
+            WHERE external_id IS NOT NULL
+        ) d
+        WHERE jp.id = d.id AND d.rn > 1
+    """)
+
+    # Built concurrently so a large table stays writable during the upgrade.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_job_postings_source_company_external",
+            "job_postings",
+            ["source", "company_name", "external_id"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ux_job_postings_source_company_external", table_name="job_postings", postgresql_concurrently=True)
+    op.drop_column("job_postings", "source_updated_at")
@@ -0,0 +1,20 @@
+"""raw_responses.body_ref
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("raw_responses", sa.Column("body_ref", sa.String(length=256), nullable=True))
+
+def downgrade():
+    op.drop_column("raw_responses", "body_ref")
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.db.redis_client import get_redis
-from app.queue.redis_queue import enqueue
+from app.queue.redis_queue import enqueue_many
+from app.utils import run_stats
 
 # Router for seed-related endpoints (kick off discovery pipelines, etc.)
 router = APIRouter()
@@ -10,25 +11,44 @@ class SeedRequest(BaseModel):
     # List of company identifiers / names that your discovery worker understands.
     # Example: ["openai", "stripe", "figma"]
     companies: list[str]
+    # Re-extract every posting even if its text is unchanged since the last pass
+    # (e.g. after a prompt change). Also bypasses conditional GETs.
+    force: bool = False
 
 @router.post("/seed-greenhouse")
 def seed_greenhouse(req: SeedRequest) -> dict:
     # Get a Redis connection/client instance.
     r = get_redis()
 
-    # Enqueue one discovery task per company.
+    # Enqueue one discovery task per company, in a single bulk push.
     # Each task will be picked up by the "discover" worker/consumer.
-    for c in req.companies:
-        enqueue(
-            r,
-            "discover",
+    enqueue_many(
+        r,
+        "discover",
+        [
             {
                 # Used by your discover worker to decide which scraper/adapter to run.
                 "source": "greenhouse",
                 # The company to discover jobs for (format depends on your Greenhouse adapter).
                 "company": c,
-            },
-        )
+                "force": req.force,
+            }
+            for c in req.companies
+        ],
+    )
 
     # Return how many tasks were created.
     return {"enqueued": len(req.companies)}
+
+
+@router.get("/runs/{run_id}/stats")
+def run_stats_for(run_id: str) -> dict:
+    # Pipeline counters for a seed run (e.g. extract_enqueued / extract_skipped).
+    stats = run_stats.get(get_redis(), run_id)
+    out: dict = {"run_id": run_id, "stats": stats}
+    if stats.get("clean_postings"):
+        # Average characters the HTML-to-text stage removed from each prompt.
+        out["avg_chars_saved_per_posting"] = (
+            stats["clean_chars_in"] - stats["clean_chars_out"]
+        ) / stats["clean_postings"]
+    return out
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import atexit
+import threading
+import httpx
+from .config import settings
+
+# Process-wide HTTP client shared by the scraper and the LLM clients, so
+# repeated requests to the same host reuse pooled keep-alive connections
+# instead of paying a TCP+TLS handshake each time.
+_client: httpx.Client | None = None
+_lock = threading.Lock()
+
+
+def _http2_enabled() -> bool:
+    # HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 without it.
+    if not settings.http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_sec,
+    )
+
+
+def get_client() -> httpx.Client:
+    # Lazily create the shared client (thread-safe; httpx.Client itself is safe
+    # to share between threads). Per-request timeouts are passed by callers.
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(http2=_http2_enabled(), limits=_limits())
+    return _client
+
+
+def new_async_client() -> httpx.AsyncClient:
+    # Async clients are bound to the event loop they are first used on, so
+    # they cannot be a process-wide singleton; owners create one per loop with
+    # the same pool settings and close it themselves.
+    return httpx.AsyncClient(http2=_http2_enabled(), limits=_limits(), follow_redirects=True)
+
+
+def close_client() -> None:
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_client)
@@ -19,8 +19,11 @@ class RawResponse(Base):
     url_hash = Column(String(64), nullable=False, index=True)
     status_code = Column(Integer, nullable=False)
     content_type = Column(String(128), nullable=True)
+    # Inline body of rows written before the raw archive existed; new rows
+    # keep only `body_ref` (see app.utils.raw_store).
     body = Column(JSON, nullable=True)
     body_text = Column(Text, nullable=True)
+    body_ref = Column(String(256), nullable=True)
     fetched_at = Column(DateTime(timezone=True), default=lambda: dt.datetime.now(dt.timezone.utc), nullable=False)
 
 class JobPosting(Base):
@@ -45,12 +48,21 @@ class JobPosting(Base):
     seniority = Column(String(64), nullable=True, index=True)
     role_function = Column(String(128), nullable=True, index=True)
     summary = Column(Text, nullable=True)
+    # Which model tier produced the current fields ("small" or "high").
+    extraction_tier = Column(String(16), nullable=True)
 
     skills = Column(JSON, nullable=True)
     technologies = Column(JSON, nullable=True)
 
     description_text = Column(Text, nullable=True)
+    # Plain-text version of description_text (tags, entities and boilerplate
+    # removed); this is what goes into LLM prompts.
+    description_clean = Column(Text, nullable=True)
+    # sha256 of description_text; extraction is skipped when it is unchanged.
+    content_hash = Column(String(64), nullable=True)
     canonical_url = Column(Text, nullable=True, index=True)
+    # The board listing's `updated_at`; a change triggers a re-scrape.
+    source_updated_at = Column(DateTime(timezone=True), nullable=True)
 
     status = Column(String(24), nullable=False, default="discovered", index=True)
 
@@ -59,3 +71,19 @@ class JobPosting(Base):
     extracted_at = Column(DateTime(timezone=True), nullable=True)
 
 Index("ix_job_postings_company_title", JobPosting.company_name, JobPosting.title)
+# Conflict target for bulk board upserts (scrape_worker.upsert_board_jobs).
+Index("ux_job_postings_source_company_external", JobPosting.source, JobPosting.company_name, JobPosting.external_id, unique=True)
+
+class Skill(Base):
+    __tablename__ = "skills"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    canonical_name = Column(String(128), nullable=False)
+
+Index("ux_skills_canonical_name", Skill.canonical_name, unique=True)
+
+class JobSkill(Base):
+    # Posting <-> skill links; the composite key doubles as the conflict
+    # target for bulk inserts.
+    __tablename__ = "job_skills"
+    job_posting_id = Column(UUID(as_uuid=True), ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(UUID(as_uuid=True), ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True, index=True)
@@ -2,8 +2,17 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-# Create the SQLAlchemy engine
-engine = create_engine(settings.postgres_dsn, pool_pre_ping=True)
+# Create the SQLAlchemy engine.
+# The pool must cover the extract worker's thread pool (EXTRACT_CONCURRENCY).
+engine = create_engine(
+    settings.postgres_dsn,
+    pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    # Send executemany UPDATEs (bulk writes by primary key) in pages rather
+    # than one round trip per row.
+    executemany_mode="values_plus_batch",
+)
 
 # Factory that creates new SQLAlchemy Session objects.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
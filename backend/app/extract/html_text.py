@@ -0,0 +1,85 @@
+from __future__ import annotations
+import html
+import re
+
+# Greenhouse `content` is HTML-escaped markup (`&lt;p&gt;...`). Sending it to a
+# model as-is spends much of the prompt budget on tags and entities and can
+# push the actual requirements past the truncation point, so postings are
+# normalized to plain text once, at scrape time.
+
+_SCRIPT_STYLE = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_LIST_ITEM = re.compile(r"<li\b[^>]*>", re.IGNORECASE)
+_BLOCK = re.compile(
+    r"</?(?:p|div|br|h[1-6]|ul|ol|li|tr|table|section|article|header|footer|blockquote|hr)\b[^>]*>",
+    re.IGNORECASE,
+)
+_TAG = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"[ \t\r\f\v\u00a0\u200b]+")
+_BLANKS = re.compile(r"\n\s*\n+")
+
+# Paragraphs that are legal/company boilerplate rather than about the role.
+# Only matched against prose paragraphs: a bullet or heading that mentions
+# e.g. a privacy policy ("- Own our privacy policy tooling") is role content.
+_BOILERPLATE = re.compile(
+    r"equal (?:employment )?opportunity|without regard to (?:race|age|sex|gender)"
+    r"|reasonable accommodations?|e-verify|affirmative action"
+    r"|applicant privacy|privacy (?:notice|policy)|pay transparency (?:nondiscrimination|policy)"
+    r"|know your rights|fair chance",
+    re.IGNORECASE,
+)
+# Headings that open a company-boilerplate section (dropped up to the next heading).
+_BOILERPLATE_HEADING = re.compile(
+    r"^(?:about us|about the company|who we are|our (?:mission|story|values)|why join us)\s*:?$",
+    re.IGNORECASE,
+)
+
+
+def _is_heading(line: str) -> bool:
+    # Short line without sentence punctuation, e.g. "Requirements" or "About
+    # us:". List items ("- Founded 2015") are never headings.
+    return len(line) <= 60 and not line.startswith("- ") and not line.rstrip(":").endswith((".", "!", "?"))
+
+
+def html_to_text(raw: str) -> str:
+    """
+    Convert (possibly HTML-escaped) job-posting markup into compact plain text.
+
+    Decodes entities, drops scripts/styles and tags (keeping block boundaries
+    as line breaks and list items as "- " bullets), collapses whitespace, and
+    removes boilerplate: EEO / accommodation / privacy prose paragraphs (list
+    items and headings are kept) and "About us"-style company sections.
+
+    Args:
+        raw: Greenhouse `content` (escaped or plain HTML) or plain text.
+
+    Returns:
+        The cleaned text.
+    """
+    # Greenhouse escapes the markup itself; decode it first so tags become tags.
+    text = html.unescape(raw)
+    text = _SCRIPT_STYLE.sub(" ", text)
+    text = _LIST_ITEM.sub("\n- ", text)
+    text = _BLOCK.sub("\n", text)
+    text = _TAG.sub("", text)
+    # Entities that were double-escaped inside the markup (e.g. &amp;nbsp;).
+    text = html.unescape(text)
+    text = _SPACES.sub(" ", text)
+
+    out: list[str] = []
+    skipping = False
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        heading = _is_heading(line)
+        if heading:
+            skipping = bool(_BOILERPLATE_HEADING.match(line))
+            if skipping:
+                continue
+        if skipping:
+            continue
+        if not heading and not line.startswith("- ") and _BOILERPLATE.search(line):
+            continue
+        out.append(line)
+
+    return _BLANKS.sub("\n", "\n".join(out))
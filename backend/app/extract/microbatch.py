@@ -0,0 +1,47 @@
+from __future__ import annotations
+from typing import TypeVar
+
+# Helpers for packing several short postings into one small-model prompt.
+
+T = TypeVar("T")
+
+# Rough chars-per-token ratio for English prose; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack(items: list[tuple[T, str]], token_budget: int, max_items: int) -> list[list[tuple[T, str]]]:
+    """
+    Greedily group (key, text) pairs into micro-batches.
+
+    Items keep their order; a group is closed when adding the next text would
+    exceed `token_budget` or the group already holds `max_items`. A text that
+    alone exceeds the budget ends up in a group of its own (callers send those
+    through the single-posting path).
+
+    Args:
+        items: (key, text) pairs, e.g. (task, description).
+        token_budget: Max estimated tokens of posting text per group.
+        max_items: Max postings per group.
+
+    Returns:
+        List of groups, each a non-empty list of the input pairs.
+    """
+    groups: list[list[tuple[T, str]]] = []
+    cur: list[tuple[T, str]] = []
+    used = 0
+
+    for key, text in items:
+        n = estimate_tokens(text)
+        if cur and (used + n > token_budget or len(cur) >= max_items):
+            groups.append(cur)
+            cur, used = [], 0
+        cur.append((key, text))
+        used += n
+
+    if cur:
+        groups.append(cur)
+    return groups
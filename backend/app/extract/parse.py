@@ -2,12 +2,67 @@ import json
 import re
 from typing import Any
 
+# Outside a string: a whole string literal (skipped in one step), a brace, or a
+# lone quote opening a string that continues into the next chunk.
+_STRUCT = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}"]')
+# Inside a string that spans chunks: its closing quote or an escape.
+_IN_STRING = re.compile(r'["\\]')
+
+# Defects LLMs commonly leave in otherwise valid JSON. String literals are
+# matched first so their contents are never rewritten.
+_REPAIR = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|,(\s*[}\]])|\b(None|True|False)\b')
+_PY_LITERALS = {"None": "null", "True": "true", "False": "false"}
+
+
+def _repair_sub(m: re.Match) -> str:
+    if m.group(1) is not None:
+        # Trailing comma: keep only the closing bracket (and its whitespace).
+        return m.group(1)
+    if m.group(2) is not None:
+        return _PY_LITERALS[m.group(2)]
+    return m.group(0)
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix common LLM JSON defects without another model call.
+
+    Removes trailing commas before `}`/`]` and rewrites Python literals
+    (None/True/False) to JSON, leaving string contents untouched.
+    """
+    return _REPAIR.sub(_repair_sub, text)
+
+
+# strict=False tolerates raw newlines/tabs inside strings, which models emit often.
+_DECODER = json.JSONDecoder(strict=False)
+
+
+def _loads_at(text: str, start: int) -> Any:
+    # Fast path: the C decoder parses the object starting at `start` and stops
+    # at its closing brace, ignoring whatever follows.
+    try:
+        return _DECODER.raw_decode(text, start)[0]
+    except json.JSONDecodeError:
+        pass
+
+    # Slow path: delimit the object with the scanner, then repair and parse.
+    obj_text = JsonObjectScanner().feed(text[start:])
+    if obj_text is None:
+        raise ValueError("Unbalanced JSON object")
+    return _DECODER.decode(repair_json(obj_text))
+
+
 def extract_json(text: str) -> dict[str, Any]:
     """
     Extract the first JSON object found inside a text blob.
 
-    This is useful when an LLM returns extra non-JSON content (e.g., explanations)
-    but you only want the JSON payload.
+    This is useful when an LLM returns extra non-JSON content (e.g., explanations,
+    markdown code fences) but you only want the JSON payload. Each candidate
+    object is parsed from its opening brace up to its own closing brace (the
+    C decoder's `raw_decode`, or a single string-aware `JsonObjectScanner`
+    pass when the text needs repair), so braces in trailing prose or inside
+    string values do not confuse it, and common defects are repaired
+    (`repair_json`) before giving up.
 
     Args:
         text: Raw text that may contain a JSON object.
@@ -17,15 +72,114 @@ def extract_json(text: str) -> dict[str, Any]:
 
     Raises:
         ValueError: If no JSON object is found in the text.
-        json.JSONDecodeError: If the extracted substring is not valid JSON.
+        json.JSONDecodeError: If no candidate object parses, even after repair.
     """
-    # Normalize whitespace and remove leading/trailing newlines.
-    text = text.strip()
+    pos = 0
+    error: json.JSONDecodeError | None = None
+
+    while True:
+        start = text.find("{", pos)
+        if start < 0:
+            break
+        try:
+            obj = _loads_at(text, start)
+        except json.JSONDecodeError as e:
+            # Prose like "use {placeholders}" before the payload; try the next brace.
+            error = e
+            pos = start + 1
+            continue
+        except ValueError:
+            # Unbalanced from here on: no later object can be complete either.
+            break
+        if isinstance(obj, dict):
+            return obj
+        pos = start + 1
+
+    if error is not None:
+        raise error
+    raise ValueError("No JSON object found")
+
+
+class JsonObjectScanner:
+    """
+    Incrementally find the first complete top-level JSON object in a text stream.
+
+    Feed chunks as they arrive (e.g. streamed model tokens). The scanner tracks
+    brace depth while skipping over string literals and escapes, so braces
+    inside strings do not count, and it runs in a single pass over the input.
+    Text before the first `{` is discarded.
+
+    Example:
+        scanner = JsonObjectScanner()
+        for chunk in stream:
+            if scanner.feed(chunk) is not None:
+                break
+        obj_text = scanner.result
+    """
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        # Text of the first complete object, once found.
+        self.result: str | None = None
+
+    def feed(self, chunk: str) -> str | None:
+        """
+        Consume the next chunk of text.
+
+        Returns:
+            The complete object text once its closing brace has been seen
+            (and on every later call), otherwise None.
+        """
+        if self.result is not None:
+            return self.result
+
+        if self._depth == 0:
+            # Not inside an object yet: skip ahead to the first opening brace.
+            start = chunk.find("{")
+            if start < 0:
+                return None
+            chunk = chunk[start:]
+
+        self._parts.append(chunk)
+        i, n = 0, len(chunk)
+        while i < n:
+            if self._escape:
+                # Character after a backslash inside a string (may have been
+                # split across chunks).
+                self._escape = False
+                i += 1
+                continue
+
+            if self._in_str:
+                m = _IN_STRING.search(chunk, i)
+                if m is None:
+                    break
+                i = m.start()
+                if chunk[i] == "\\":
+                    self._escape = True
+                else:
+                    self._in_str = False
+                i += 1
+                continue
 
-    # Find the first {...} block in the text (including multi-line JSON).
-    m = re.search(r"\{.*\}", text, flags=re.DOTALL)
-    if not m:
-        raise ValueError("No JSON object found")
+            m = _STRUCT.search(chunk, i)
+            if m is None:
+                break
+            tok = m.group()
+            i = m.end()
+            if tok == "{":
+                self._depth += 1
+            elif tok == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts[-1] = chunk[:i]
+                    self.result = "".join(self._parts)
+                    return self.result
+            elif tok == '"':
+                # Unterminated in this chunk; finish it on the next feed.
+                self._in_str = True
 
-    # Parse the matched substring as JSON.
-    return json.loads(m.group(0))
+        return None
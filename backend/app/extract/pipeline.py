@@ -0,0 +1,188 @@
+from __future__ import annotations
+import datetime as dt
+import uuid
+from functools import partial
+from typing import Callable
+from sqlalchemy import update
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.session import SessionLocal
+from app.db.models import JobPosting
+from app.llm.ollama_client import chat as ollama_chat
+from app.llm.high_tier import chat as high_tier_chat
+from app.llm.cache import cached_chat
+from app.extract.prompts import (
+    small_model_prompt, batch_small_model_prompt, high_tier_prompt,
+    SMALL_PROMPT_VERSION, SMALL_BATCH_PROMPT_VERSION, HIGH_TIER_PROMPT_VERSION,
+)
+from app.extract.html_text import html_to_text
+from app.extract.parse import extract_json
+from app.extract import rules
+from app.extract.rules import Prefill
+from app.extract.schema import ExtractionLLM
+from app.normalize.skills import canonicalize
+from app.services.storage.job_store import upsert_skills_and_links_many
+
+logger = get_logger(__name__)
+
+# Extraction steps shared by the extract and extract_high workers.
+
+def parse_extraction(raw: str, known: dict | None = None) -> ExtractionLLM:
+    data = extract_json(raw)
+    if known:
+        data = merge_known(data, known)
+    return ExtractionLLM.model_validate(data)
+
+def merge_known(data: dict, known: dict) -> dict:
+    # Rule-based values win over the model's; skills are unioned.
+    out = {**data, **{k: v for k, v in known.items() if k != "skills"}}
+    if "skills" in known:
+        out["skills"] = list(known["skills"]) + [s for s in data.get("skills") or [] if s not in known["skills"]]
+    return out
+
+def known_fields(pre: Prefill | None) -> dict:
+    # Confident rule-based fields, or nothing when the rules are turned off.
+    if pre is None or not settings.extract_rules_enabled:
+        return {}
+    return pre.confident(settings.extract_rules_min_confidence)
+
+def needs_escalation(parsed: ExtractionLLM) -> bool:
+    if not parsed.role_function or parsed.role_function == "other":
+        return True
+    if len(parsed.skills) < 2:
+        return True
+    return False
+
+def high_tier_enabled() -> bool:
+    return bool(settings.openai_api_key or settings.anthropic_api_key)
+
+def run_small(text: str, pre: Prefill | None = None) -> ExtractionLLM:
+    known = known_fields(pre)
+    # Skills found by the lexicon are merged in, but the model is still asked
+    # for its own list.
+    ask = {k: v for k, v in known.items() if k != "skills"}
+    validate = partial(parse_extraction, known=known)
+    raw = cached_chat(ollama_chat, small_model_prompt(text, ask), model=settings.ollama_model_small, prompt_version=SMALL_PROMPT_VERSION, validate=validate)
+    return validate(raw)
+
+def run_rules(text: str, pre: Prefill | None) -> ExtractionLLM | None:
+    # The whole extraction from rules alone, when enabled and every field is
+    # covered with enough confidence; None means "ask the model".
+    if pre is None or not (settings.extract_rules_enabled and settings.extract_rules_skip_llm):
+        return None
+    if not rules.complete(pre, settings.extract_rules_min_confidence):
+        return None
+    return ExtractionLLM.model_validate({**pre.values, "summary": rules.summary(text)})
+
+def run_small_batch(texts: list[str]) -> list[ExtractionLLM | None]:
+    # One small-model call for several postings. Returns one result per text,
+    # None where that posting's slice is missing or fails validation.
+    items = [(str(i + 1), text) for i, text in enumerate(texts)]
+    raw = cached_chat(ollama_chat, batch_small_model_prompt(items), model=settings.ollama_model_small, prompt_version=SMALL_BATCH_PROMPT_VERSION, validate=extract_json)
+    data = extract_json(raw)
+
+    out: list[ExtractionLLM | None] = []
+    for key, _ in items:
+        try:
+            out.append(ExtractionLLM.model_validate(data[key]))
+        except Exception:
+            out.append(None)
+    return out
+
+def run_high(text: str, chat_fn: Callable[[str], str] = high_tier_chat) -> ExtractionLLM:
+    # `chat_fn` is only called on a cache miss (the extract_high worker passes
+    # one that paces and meters provider calls).
+    raw = cached_chat(chat_fn, high_tier_prompt(text), model=f"{settings.high_tier_provider}:{settings.high_tier_model}", prompt_version=HIGH_TIER_PROMPT_VERSION, validate=parse_extraction)
+    return parse_extraction(raw)
+
+def prompt_text(description_text: str | None, description_clean: str | None) -> str | None:
+    # Text to send to a model: the cleaned version, computed on the fly for
+    # rows scraped before the HTML-to-text stage existed.
+    if description_clean:
+        return description_clean
+    return html_to_text(description_text) if description_text else None
+
+def load_text(jid: uuid.UUID) -> str | None:
+    with SessionLocal() as db:
+        jp = db.get(JobPosting, jid)
+        return prompt_text(jp.description_text, jp.description_clean) if jp else None
+
+def prefill(title: str | None, location_raw: str | None, text: str | None) -> Prefill | None:
+    if not text or not settings.extract_rules_enabled:
+        return None
+    return rules.pre_extract(title, location_raw, text)
+
+def load_postings(jids: list[uuid.UUID]) -> dict[uuid.UUID, tuple[str | None, str | None, str | None]]:
+    # (prompt text, title, location_raw) for a whole leased batch in one query.
+    with SessionLocal() as db:
+        rows = db.query(
+            JobPosting.id, JobPosting.description_text, JobPosting.description_clean,
+            JobPosting.title, JobPosting.location_raw,
+        ).filter(JobPosting.id.in_(jids)).all()
+    return {jid: (prompt_text(raw, clean), title, loc) for jid, raw, clean, title, loc in rows}
+
+def _result_row(jid: uuid.UUID, parsed: ExtractionLLM, tier: str, now: dt.datetime) -> dict:
+    skills = canonicalize(parsed.skills)
+    return {
+        "id": jid,
+        "summary": parsed.summary,
+        "role_function": parsed.role_function,
+        "seniority": parsed.seniority,
+        "location_city": parsed.location_city,
+        "location_state": parsed.location_state,
+        "location_country": parsed.location_country,
+        "salary_min": parsed.salary_min,
+        "salary_max": parsed.salary_max,
+        "salary_currency": parsed.salary_currency,
+        "skills": skills,
+        "technologies": skills[:12],
+        "extraction_tier": tier,
+        "status": "extracted",
+        "extracted_at": now,
+    }
+
+def _write_results(db, rows: list[dict]) -> None:
+    # ORM bulk UPDATE by primary key (one executemany) + the skill graph.
+    db.execute(update(JobPosting), rows)
+    upsert_skills_and_links_many(db, skills_by_posting={row["id"]: row["skills"] for row in rows}, replace=True)
+
+def store_results(results: list[tuple[uuid.UUID, ExtractionLLM, str]]) -> set[uuid.UUID]:
+    """
+    Write a batch of extraction results in one transaction.
+
+    If the batch write fails (e.g. one value violates a column limit), each
+    row is retried in its own savepoint so one bad row cannot poison the rest.
+
+    Args:
+        results: (job_posting_id, parsed result, tier) triples.
+
+    Returns:
+        The ids whose results were committed; callers ack only those.
+    """
+    if not results:
+        return set()
+    now = dt.datetime.now(dt.timezone.utc)
+    rows = [_result_row(jid, parsed, tier, now) for jid, parsed, tier in results]
+
+    with SessionLocal() as db:
+        try:
+            _write_results(db, rows)
+            db.commit()
+            return {row["id"] for row in rows}
+        except Exception:
+            db.rollback()
+            logger.warning("store_results_batch_failed rows=%d", len(rows), exc_info=True)
+
+        ok: set[uuid.UUID] = set()
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    _write_results(db, [row])
+                ok.add(row["id"])
+            except Exception:
+                logger.exception("store_result_error", extra={"job_posting_id": str(row["id"])})
+        db.commit()
+        return ok
+
+def store_result(jid: uuid.UUID, parsed: ExtractionLLM, tier: str = "small") -> bool:
+    return jid in store_results([(jid, parsed, tier)])
@@ -1,5 +1,27 @@
-def small_model_prompt(job_text: str) -> str:
-    return f"""You are an information extraction assistant.
+# Bump a version whenever its template changes: it is part of the LLM
+# response cache key (app.llm.cache), so stale completions stop matching.
+SMALL_PROMPT_VERSION = "1"
+SMALL_BATCH_PROMPT_VERSION = "1"
+HIGH_TIER_PROMPT_VERSION = "1"
+
+SMALL_FIELDS = {
+    "summary": "string",
+    "role_function": "string",
+    "seniority": "string or null",
+    "location_city": "string or null",
+    "location_state": "string or null",
+    "location_country": "string or null",
+    "salary_min": "int or null",
+    "salary_max": "int or null",
+    "salary_currency": "string or null",
+    "skills": "array of strings",
+}
+
+def small_model_prompt(job_text: str, known: dict | None = None) -> str:
+    # `known` holds fields already filled by the rule-based pre-extractor;
+    # the model is only asked for the rest.
+    if not known:
+        return """You are an information extraction assistant.
             Extract minimal structured fields from the job posting text.
             
             Return JSON with keys:
@@ -17,6 +39,43 @@ def small_model_prompt(job_text: str) -> str:
             Job posting:
             """ + job_text[:12000]
 
+    wanted = ",\n            ".join(f"{k} ({t})" for k, t in SMALL_FIELDS.items() if k not in known)
+    return f"""You are an information extraction assistant.
+            Extract minimal structured fields from the job posting text.
+            
+            Return JSON with keys:
+            {wanted}.
+            
+            Job posting:
+            """ + job_text[:12000]
+
+def batch_small_model_prompt(postings: list[tuple[str, str]], max_chars_each: int = 12000) -> str:
+    # Several postings in one request; `postings` is a list of (key, text).
+    # The model answers with one JSON object keyed by those keys, so each
+    # slice can be validated (and retried alone) independently.
+    blocks = "\n\n".join(
+        f"=== Posting {key} ===\n{text[:max_chars_each]}" for key, text in postings
+    )
+    keys = ", ".join(f'"{key}"' for key, _ in postings)
+    return f"""You are an information extraction assistant.
+            Extract minimal structured fields from each job posting below.
+            
+            Return ONE JSON object whose keys are the posting keys ({keys}).
+            Each value is an object with keys:
+            summary (string),
+            role_function (string),
+            seniority (string or null),
+            location_city (string or null),
+            location_state (string or null),
+            location_country (string or null),
+            salary_min (int or null),
+            salary_max (int or null),
+            salary_currency (string or null),
+            skills (array of strings).
+            
+            Job postings:
+            """ + blocks
+
 def high_tier_prompt(job_text: str) -> str:
     return f"""You are a precise information extraction assistant for job postings.
             Return STRICT JSON only (no markdown).
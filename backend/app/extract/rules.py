@@ -0,0 +1,283 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass, field
+from app.normalize.skills import canonicalize, current_taxonomy
+
+# Deterministic pre-extraction: fields that can be read straight off the
+# title, location string or posting text, each with a confidence in [0, 1].
+# The small-model prompt then only asks for what is still missing.
+
+# Salary: "$120,000 - $150,000", "$120k–150k", "USD 90,000 to 110,000",
+# "£50,000 – £60,000 per year". Hourly ranges are recognised so they can be
+# ignored (the schema's salary fields are annual).
+_CURRENCY = {"$": "USD", "usd": "USD", "£": "GBP", "gbp": "GBP", "€": "EUR", "eur": "EUR",
+             "cad": "CAD", "ca$": "CAD", "c$": "CAD", "aud": "AUD", "a$": "AUD"}
+_AMOUNT = r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*([kK])?"
+_SALARY = re.compile(
+    r"(?P<cur>ca\$|c\$|a\$|[$£€]|\b(?:usd|gbp|eur|cad|aud)\b)\s*" + _AMOUNT
+    + r"\s*(?:-|–|—|to)\s*(?:ca\$|c\$|a\$|[$£€]|\b(?:usd|gbp|eur|cad|aud)\b)?\s*" + _AMOUNT
+    + r"(?P<hourly>\s*(?:/\s*(?:hr|hour)|per\s+hour|an\s+hour|hourly))?",
+    re.IGNORECASE,
+)
+
+# Seniority keywords, checked against the title. The first matching group
+# wins, so the more senior / more specific terms come first.
+#
+# "Staff" is a level only on IC engineering/science titles ("Staff Engineer",
+# "Engineer, Staff"), not in "Chief of Staff" or "Staff Accountant".
+# "Manager" is a level only for people-management titles; in "Product
+# Manager", "Account Manager" or "Customer Success Manager" it names the role,
+# so it matches as `manager_role`, which ranks last and is never confident.
+# Likewise "Lead" is not a level in "Lead Generation/Development
+# Representative", and "Associate" means junior only on IC and PM titles (not
+# "Associate General Counsel"); elsewhere it matches as the weak
+# `associate_role`.
+_STAFF_IC = r"engineer|scientist|developer|designer|architect|researcher|sre|swe"
+_JUNIOR_IC = r"engineer|scientist|developer|designer|architect|researcher|analyst|product\s+manager"
+_SENIORITY = [
+    ("intern", r"intern(?:ship)?|co-?op"),
+    ("cxo", r"chief\s+\w+\s+officer|c[etfomi]o"),
+    ("vp", r"vp|svp|evp|vice\s+president"),
+    ("director", r"director|head\s+of"),
+    ("principal", r"principal"),
+    ("staff", rf"staff(?=(?:\s+[\w/&+-]+){{0,3}}?\s+(?:{_STAFF_IC})\b)|(?<=,\s)staff"),
+    ("lead", r"lead(?!\s+(?:gen(?:eration)?|development|qualification)\b)"),
+    ("manager", r"(?:engineering|software|development|people|general|team|hiring)\s+manager"
+                r"|manager,?\s+(?:of\s+)?(?:software\s+)?engineering"),
+    ("senior", r"senior|sr\.?|iii|iv"),
+    ("junior", r"junior|jr\.?|entry[\s-]level|new\s+grad|i"
+               rf"|associate(?=(?:\s+[\w/&+-]+){{0,2}}?\s+(?:{_JUNIOR_IC})\b)"),
+    ("mid", r"ii|mid[\s-]level"),
+    ("associate_role", r"associate"),
+    ("manager_role", r"manager"),
+]
+# Role-noun matches: (level reported, below the default confidence threshold).
+_WEAK_SENIORITY = {"associate_role": "junior", "manager_role": "manager"}
+_SENIORITY_RE = re.compile(
+    "|".join(rf"(?P<{name}>\b(?:{pat})\b)" for name, pat in _SENIORITY), re.IGNORECASE
+)
+_SENIORITY_RANK = {name: i for i, (name, _) in enumerate(_SENIORITY)}
+
+# role_function keywords (same vocabulary as the high-tier prompt). Earlier
+# entries take precedence: "Sales Engineer" is sales, "Data Engineer" is data.
+_FUNCTIONS = [
+    ("security", r"security|secops|appsec|infosec"),
+    ("sales", r"sales|account\s+executive|account\s+manager|sdr|bdr|business\s+development"),
+    ("customer_success", r"customer\s+success|customer\s+support|support\s+engineer|implementation"),
+    ("marketing", r"marketing|growth|brand|content|seo|demand\s+gen(?:eration)?"),
+    ("data", r"data|analytics|analyst|machine\s+learning|ml|ai|scientist"),
+    ("product", r"product\s+manager|product\s+management|product\s+designer|product\s+owner|designer|ux|ui"),
+    ("finance", r"finance|financial|accountant|accounting|controller|fp&a|tax|payroll"),
+    ("hr", r"recruit(?:er|ing)|talent|people|hr|human\s+resources"),
+    ("engineering", r"engineer(?:ing)?|developer|sre|devops|architect|programmer"),
+    ("operations", r"operations|ops|logistics|supply\s+chain|office\s+manager"),
+]
+_FUNCTION_RE = re.compile(
+    "|".join(rf"(?P<{name}>\b(?:{pat})\b)" for name, pat in _FUNCTIONS), re.IGNORECASE
+)
+_FUNCTION_RANK = {name: i for i, (name, _) in enumerate(_FUNCTIONS)}
+
+# Location strings as Greenhouse shows them: "San Francisco, CA",
+# "London, United Kingdom", "Remote - US", "Toronto, ON, Canada".
+_US_STATES = set(
+    "AL AK AZ AR CA CO CT DE DC FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO MT NE NV NH "
+    "NJ NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY".split()
+)
+_CA_PROVINCES = set("AB BC MB NB NL NS NT NU ON PE QC SK YT".split())
+_COUNTRY_ALIASES = {
+    "us": "United States", "usa": "United States", "u.s.": "United States",
+    "united states": "United States", "united states of america": "United States",
+    "uk": "United Kingdom", "u.k.": "United Kingdom", "united kingdom": "United Kingdom",
+    "canada": "Canada", "germany": "Germany", "france": "France", "ireland": "Ireland",
+    "netherlands": "Netherlands", "spain": "Spain", "india": "India", "australia": "Australia",
+    "singapore": "Singapore", "japan": "Japan", "brazil": "Brazil", "mexico": "Mexico",
+    "poland": "Poland", "israel": "Israel", "sweden": "Sweden", "switzerland": "Switzerland",
+}
+_REMOTE = re.compile(r"\bremote\b|\banywhere\b", re.IGNORECASE)
+_MULTI_LOCATION = re.compile(r";|\||/|\bor\b|\band\b|\d+\s+locations", re.IGNORECASE)
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class Prefill:
+    # Field values found by the rules, keyed like ExtractionLLM.
+    values: dict = field(default_factory=dict)
+    # Confidence per key in `values`.
+    confidence: dict = field(default_factory=dict)
+
+    def set(self, key: str, value, confidence: float) -> None:
+        self.values[key] = value
+        self.confidence[key] = confidence
+
+    def confident(self, threshold: float) -> dict:
+        # The values that are reliable enough to skip asking the model for.
+        return {k: v for k, v in self.values.items() if self.confidence[k] >= threshold}
+
+
+def salary(text: str) -> tuple[int, int, str, float] | None:
+    """
+    Find an annual salary range in `text`.
+
+    Returns:
+        (min, max, currency, confidence), or None if no usable range was found.
+        Several distinct ranges (e.g. per-location bands) are merged into their
+        overall span at lower confidence.
+    """
+    found = []
+    for m in _SALARY.finditer(text):
+        if m.group("hourly"):
+            continue
+        lo = _amount(m.group(2), m.group(3) or m.group(5))
+        hi = _amount(m.group(4), m.group(5))
+        if lo > hi:
+            lo, hi = hi, lo
+        # Ignore things that are clearly not annual pay (e.g. "$5 - $10M ARR").
+        if lo < 10_000 or hi > 5_000_000:
+            continue
+        found.append((lo, hi, _CURRENCY[m.group("cur").lower()]))
+
+    if not found:
+        return None
+    currencies = {c for _, _, c in found}
+    if len(currencies) > 1:
+        return None
+    lo = min(x[0] for x in found)
+    hi = max(x[1] for x in found)
+    confidence = 0.95 if len(set(found)) == 1 else 0.8
+    return lo, hi, currencies.pop(), confidence
+
+def _amount(num: str, k: str | None) -> int:
+    value = float(num.replace(",", ""))
+    return int(value * 1000) if k else int(value)
+
+
+def seniority(title: str) -> tuple[str, float]:
+    # A keyword in the title is reliable; a title without one is usually mid.
+    hits = [m.lastgroup for m in _SENIORITY_RE.finditer(title)]
+    if not hits:
+        return "mid", 0.6
+    best = min(hits, key=_SENIORITY_RANK.__getitem__)
+    if best in _WEAK_SENIORITY:
+        # Role name, not necessarily a level: leave it to the model.
+        return _WEAK_SENIORITY[best], 0.6
+    # Roman-numeral levels alone ("Engineer II") are a weaker signal.
+    roman = all(m.group().lower() in ("i", "ii", "iii", "iv") for m in _SENIORITY_RE.finditer(title))
+    return best, 0.8 if roman else 0.95
+
+
+def role_function(title: str) -> tuple[str, float] | None:
+    hits = {m.lastgroup for m in _FUNCTION_RE.finditer(title)}
+    if not hits:
+        return None
+    best = min(hits, key=_FUNCTION_RANK.__getitem__)
+    return best, 0.9 if len(hits) == 1 else 0.75
+
+
+def location(location_raw: str) -> tuple[dict, float] | None:
+    """
+    Split a Greenhouse location string into city/state/country.
+
+    Returns:
+        (fields, confidence) where fields has the location_* keys, or None
+        if the string is empty or lists several locations.
+    """
+    raw = location_raw.strip()
+    if not raw or _MULTI_LOCATION.search(raw):
+        return None
+
+    out = {"location_city": None, "location_state": None, "location_country": None}
+    if _REMOTE.search(raw):
+        rest = _REMOTE.sub("", raw).strip(" -–,()")
+        country = _COUNTRY_ALIASES.get(rest.lower())
+        if rest and not country:
+            return None
+        out["location_country"] = country
+        return out, 0.9
+
+    parts = [p.strip() for p in raw.split(",") if p.strip()]
+    if len(parts) == 3:
+        city, state, country = parts
+        country = _COUNTRY_ALIASES.get(country.lower(), country)
+        out.update(location_city=city, location_state=state, location_country=country)
+        return out, 0.9
+    if len(parts) == 2:
+        city, tail = parts
+        out["location_city"] = city
+        if tail.upper() in _US_STATES:
+            out.update(location_state=tail.upper(), location_country="United States")
+            return out, 0.95
+        if tail.upper() in _CA_PROVINCES:
+            out.update(location_state=tail.upper(), location_country="Canada")
+            return out, 0.95
+        if tail.lower() in _COUNTRY_ALIASES:
+            out["location_country"] = _COUNTRY_ALIASES[tail.lower()]
+            return out, 0.9
+        out["location_country"] = tail
+        return out, 0.6
+    if len(parts) == 1 and parts[0].lower() in _COUNTRY_ALIASES:
+        out["location_country"] = _COUNTRY_ALIASES[parts[0].lower()]
+        return out, 0.9
+    return None
+
+
+def skills(text: str) -> list[str]:
+    # Taxonomy aliases found in the text (one regex pass; see Taxonomy.lexicon_re).
+    return canonicalize([m.group(1) for m in current_taxonomy().lexicon_re.finditer(text)])
+
+
+def summary(text: str, max_sentences: int = 2, max_chars: int = 400) -> str:
+    # Extractive fallback used only when the model is skipped entirely.
+    first = " ".join(line for line in text.splitlines() if line.strip())
+    return " ".join(_SENTENCE.split(first)[:max_sentences])[:max_chars]
+
+
+def pre_extract(title: str | None, location_raw: str | None, text: str) -> Prefill:
+    """
+    Run every rule over one posting.
+
+    Args:
+        title: Posting title (seniority, role_function).
+        location_raw: Greenhouse location string.
+        text: Cleaned posting text (salary, skills).
+
+    Returns:
+        A Prefill with whatever could be determined.
+    """
+    pre = Prefill()
+    title = title or ""
+
+    if (s := salary(text)) is not None:
+        lo, hi, cur, conf = s
+        pre.set("salary_min", lo, conf)
+        pre.set("salary_max", hi, conf)
+        pre.set("salary_currency", cur, conf)
+
+    if title:
+        level, conf = seniority(title)
+        pre.set("seniority", level, conf)
+        if (f := role_function(title)) is not None:
+            pre.set("role_function", *f)
+
+    if location_raw and (loc := location(location_raw)) is not None:
+        fields, conf = loc
+        for k, v in fields.items():
+            pre.set(k, v, conf)
+
+    found = skills(text)
+    if found:
+        # A handful of lexicon hits is a decent skill list; one or two is not.
+        pre.set("skills", found, 0.9 if len(found) >= 3 else 0.5)
+    return pre
+
+
+# Fields a posting must have from the rules to skip the model altogether
+# (summary is then taken from the text itself).
+SKIP_FIELDS = (
+    "role_function", "seniority", "location_city", "location_state", "location_country",
+    "salary_min", "salary_max", "salary_currency", "skills",
+)
+
+def complete(pre: Prefill, threshold: float) -> bool:
+    known = pre.confident(threshold)
+    return all(k in known for k in SKIP_FIELDS)
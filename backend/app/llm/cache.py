@@ -0,0 +1,89 @@
+from __future__ import annotations
+import threading
+from typing import Callable
+from redis import Redis
+from app.core.config import settings
+from app.db.redis_client import get_redis
+from app.utils.hashing import sha256_hex
+
+# Persistent LLM response cache in Redis.
+#
+# Keys are llm:cache:<model>:<prompt version>:<sha256 of the final prompt>. The
+# prompt already embeds the truncated posting text, so identical postings
+# (duplicates across boards, reposts, retries after a DB failure) map to the
+# same entry; bumping a prompt version invalidates everything built with the
+# old template.
+#
+# Eviction: every entry has a TTL (LLM_CACHE_TTL_SEC) and an insertion-time
+# index (ZSET) bounds the entry count to LLM_CACHE_MAX_ENTRIES, oldest first.
+# Hit/miss counters are kept per model in the llm:cache:stats hash.
+PREFIX = "llm:cache"
+INDEX_KEY = f"{PREFIX}:index"
+STATS_KEY = f"{PREFIX}:stats"
+
+_r: Redis | None = None
+_lock = threading.Lock()
+
+
+def _redis() -> Redis:
+    global _r
+    if _r is None:
+        with _lock:
+            if _r is None:
+                _r = get_redis()
+    return _r
+
+
+def cache_key(model: str, prompt_version: str, prompt: str) -> str:
+    return f"{PREFIX}:{model}:{prompt_version}:{sha256_hex(prompt)}"
+
+
+def cached_chat(
+    chat_fn: Callable[[str], str],
+    prompt: str,
+    *,
+    model: str,
+    prompt_version: str,
+    validate: Callable[[str], object] | None = None,
+) -> str:
+    # Return the cached completion for (model, prompt_version, prompt), calling
+    # `chat_fn(prompt)` and storing its output on a miss.
+    #
+    # `validate` runs on a fresh completion before it is stored; if it raises,
+    # the error propagates and nothing is cached, so a malformed answer gets a
+    # new model call on retry instead of being replayed from the cache.
+    if not settings.llm_cache_enabled:
+        return chat_fn(prompt)
+
+    r = _redis()
+    key = cache_key(model, prompt_version, prompt)
+
+    hit = r.get(key)
+    if hit is not None:
+        r.hincrby(STATS_KEY, f"hits:{model}", 1)
+        return hit
+
+    r.hincrby(STATS_KEY, f"misses:{model}", 1)
+    out = chat_fn(prompt)
+    if validate is not None:
+        validate(out)
+
+    pipe = r.pipeline()
+    pipe.set(key, out, ex=settings.llm_cache_ttl_sec)
+    pipe.zadd(INDEX_KEY, {key: r.time()[0]})
+    pipe.zcard(INDEX_KEY)
+    size = pipe.execute()[-1]
+
+    # Trim the oldest entries once over the size bound.
+    overflow = size - settings.llm_cache_max_entries
+    if overflow > 0:
+        oldest = [k for k, _ in r.zpopmin(INDEX_KEY, overflow)]
+        if oldest:
+            r.delete(*oldest)
+
+    return out
+
+
+def stats() -> dict[str, int]:
+    # Hit/miss counters, e.g. {"hits:gemma3:4b": 120, "misses:gemma3:4b": 30}.
+    return {k: int(v) for k, v in _redis().hgetall(STATS_KEY).items()}
@@ -1,24 +1,32 @@
 from __future__ import annotations
-import httpx
+from app.core.http_client import get_client
 from app.core.config import settings
 
-def _openai_chat(prompt: str) -> str:
+def _openai_chat(prompt: str) -> tuple[str, int | None]:
+    # Returns (text, total tokens billed), the latter from the response's
+    # `usage` block when the API reports it.
     if not settings.openai_api_key:
         raise RuntimeError("OPENAI_API_KEY not set")
     url = "https://api.openai.com/v1/responses"
     headers = {"Authorization": f"Bearer {settings.openai_api_key}", "Content-Type": "application/json"}
     payload = {"model": settings.high_tier_model, "input": prompt}
-    with httpx.Client(timeout=120) as client:
-        r = client.post(url, headers=headers, json=payload)
-        r.raise_for_status()
-        data = r.json()
-        out = data.get("output", [])
-        texts = []
-        for item in out:
-            for c in item.get("content", []):
-                if c.get("type") in ("output_text", "text"):
-                    texts.append(c.get("text", ""))
-        return "\n".join(texts).strip()
+    r = get_client().post(url, headers=headers, json=payload, timeout=120)
+    r.raise_for_status()
+    data = r.json()
+    out = data.get("output", [])
+    texts = []
+    for item in out:
+        for c in item.get("content", []):
+            if c.get("type") in ("output_text", "text"):
+                texts.append(c.get("text", ""))
+    usage = data.get("usage") or {}
+    tokens = usage.get("total_tokens")
+    if tokens is None and ("input_tokens" in usage or "output_tokens" in usage):
+        tokens = (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
+    return "\n".join(texts).strip(), tokens
 
-def chat(prompt: str) -> str:
+def chat_with_usage(prompt: str) -> tuple[str, int | None]:
     return _openai_chat(prompt)
+
+def chat(prompt: str) -> str:
+    return _openai_chat(prompt)[0]
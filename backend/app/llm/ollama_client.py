@@ -1,12 +1,35 @@
 from __future__ import annotations
-import httpx
+import json
+import time
+from dataclasses import dataclass
+from app.core.http_client import get_client
 from app.core.config import settings
+from app.core.logging import get_logger
+from app.extract.parse import _DECODER, JsonObjectScanner, repair_json
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class StreamStats:
+    # Seconds from sending the request to the first generated token.
+    ttft_sec: float
+    # Seconds from the first token to the last token we consumed.
+    gen_sec: float
+    # Number of NDJSON chunks consumed.
+    chunks: int
+    # True if we hung up as soon as the JSON object was complete.
+    stopped_early: bool
+
 
 def chat(prompt: str, model: str | None = None) -> str:
     """
     Send a prompt to the configured Ollama server and return the generated text.
 
     This is a lightweight wrapper around Ollama's `/api/generate` endpoint.
+    With `settings.ollama_stream` enabled it streams the generation and stops
+    reading as soon as the first complete JSON object has arrived (see
+    `chat_stream`); otherwise it waits for the full response.
 
     Args:
         prompt: The prompt text to send to the model.
@@ -20,6 +43,14 @@ def chat(prompt: str, model: str | None = None) -> str:
         httpx.HTTPStatusError: If the Ollama server returns a non-2xx response.
         httpx.RequestError: If the request fails due to network/connection issues.
     """
+    if settings.ollama_stream:
+        text, stats = chat_stream(prompt, model)
+        logger.info(
+            "ollama_stream ttft_ms=%.0f gen_ms=%.0f chunks=%d stopped_early=%s",
+            stats.ttft_sec * 1000, stats.gen_sec * 1000, stats.chunks, stats.stopped_early,
+        )
+        return text
+
     # Pick a model: either caller override or the configured default.
     m = model or settings.ollama_model_small
 
@@ -33,8 +64,98 @@ def chat(prompt: str, model: str | None = None) -> str:
         "stream": False,
     }
 
-    # Send the request and extract the "response" field from the JSON payload.
-    with httpx.Client(timeout=120) as client:
-        r = client.post(url, json=payload)
+    # Send the request over the shared pooled client and extract the
+    # "response" field from the JSON payload.
+    r = get_client().post(url, json=payload, timeout=120)
+    r.raise_for_status()
+    return r.json().get("response", "")
+
+
+def _decodes(obj_text: str) -> bool:
+    # Whether a balanced {...} is a JSON object (after the usual repairs) and
+    # not prose such as "fill in the {fields}".
+    try:
+        return isinstance(_DECODER.decode(repair_json(obj_text)), dict)
+    except ValueError:
+        return False
+
+
+def chat_stream(prompt: str, model: str | None = None) -> tuple[str, StreamStats]:
+    """
+    Stream a generation from Ollama and stop once a JSON object is complete.
+
+    Ollama streams NDJSON lines of the form `{"response": "<tokens>", "done": false}`.
+    Tokens are fed to a `JsonObjectScanner`; once the first top-level object
+    that decodes as JSON closes, the response is closed, which makes Ollama
+    stop generating, so we never wait for (or pay for) trailing model chatter.
+    Balanced braces that do not decode (prose like "the {fields}") are skipped
+    the same way `extract_json` skips them.
+
+    Args:
+        prompt: The prompt text to send to the model.
+        model: Optional Ollama model override (defaults to `settings.ollama_model_small`).
+
+    Returns:
+        (text, stats): the generated text up to the end of the first JSON object
+        (or the whole generation if none appeared), plus timing stats.
+
+    Raises:
+        httpx.HTTPStatusError: If the Ollama server returns a non-2xx response.
+        httpx.RequestError: If the request fails due to network/connection issues.
+    """
+    m = model or settings.ollama_model_small
+    url = f"{settings.ollama_base_url}/api/generate"
+    payload = {"model": m, "prompt": prompt, "stream": True}
+
+    scanner = JsonObjectScanner()
+    # Offset in the generated text where the current scanner started.
+    scan_from = 0
+    result: str | None = None
+    pieces: list[str] = []
+    chunks = 0
+    t0 = time.perf_counter()
+    t_first: float | None = None
+    stopped_early = False
+
+    with get_client().stream("POST", url, json=payload, timeout=120) as r:
         r.raise_for_status()
-        return r.json().get("response", "")
+        for line in r.iter_lines():
+            if not line:
+                continue
+            msg = json.loads(line)
+            token = msg.get("response", "")
+            chunks += 1
+            if token:
+                if t_first is None:
+                    t_first = time.perf_counter()
+                pieces.append(token)
+                obj = scanner.feed(token)
+                while obj is not None and not _decodes(obj):
+                    # Not JSON: resume just after this candidate's opening
+                    # brace, which may already complete the next candidate.
+                    generated = "".join(pieces)
+                    scan_from = generated.find("{", scan_from) + 1
+                    scanner = JsonObjectScanner()
+                    obj = scanner.feed(generated[scan_from:])
+                if obj is not None:
+                    result = obj
+                    # Leaving the `with` block closes the connection mid-stream.
+                    stopped_early = not msg.get("done", False)
+                    break
+            if msg.get("done"):
+                break
+
+    t_end = time.perf_counter()
+    if t_first is None:
+        t_first = t_end
+
+    # Prefer the exact object text; fall back to everything generated so the
+    # caller's parser can report what went wrong.
+    text = result if result is not None else "".join(pieces)
+    stats = StreamStats(
+        ttft_sec=t_first - t0,
+        gen_sec=t_end - t_first,
+        chunks=chunks,
+        stopped_early=stopped_early,
+    )
+    return text, stats
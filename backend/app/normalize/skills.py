@@ -1,31 +1,297 @@
 from __future__ import annotations
+import json
+import os
 import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
 from rapidfuzz import fuzz, process
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# The skill taxonomy (canonical skill -> aliases / misspellings) lives in a
+# versioned data file so it can grow to thousands of entries and be updated
+# without a deploy; workers pick up a new version on their own (see
+# `current()`). This helps deduplicate skill lists and improve downstream
+# filtering/search.
+DEFAULT_TAXONOMY_PATH = Path(__file__).resolve().parent.parent / "seed" / "skills_taxonomy.json"
+
+# Longest skill name we keep (`skills.canonical_name` is String(128)); longer
+# "skills" are model sentences, not skills.
+MAX_SKILL_LEN = 128
+
+# Characters outside this set become spaces. Keeps common tech chars like:
+# c++, node.js, c#, etc.
+_CLEAN = re.compile(r"[^a-z0-9.+#-]+")
+
+def clean_token(t: str) -> str:
+    return _CLEAN.sub(" ", t.strip().lower()).strip()
+
+
+@dataclass(frozen=True)
+class Taxonomy:
+    version: str
+    # Cleaned alias (canonical names included) -> canonical skill.
+    canon: dict[str, str]
+    # Raw aliases to look for in free text (ambiguous words excluded).
+    lexicon: tuple[str, ...] = ()
+
+    @cached_property
+    def lexicon_re(self) -> re.Pattern:
+        # One alternation over every alias (longest first), so free text is
+        # scanned once however large the taxonomy is.
+        alts = "|".join(re.escape(a) for a in sorted(self.lexicon, key=len, reverse=True))
+        return re.compile(rf"(?<![\w.+#-])({alts})(?![\w+#-]|\.\w)", re.IGNORECASE)
+
+
+def load_taxonomy(path: str | os.PathLike) -> Taxonomy:
+    """
+    Load a taxonomy file.
+
+    Format:
+        {"version": "...", "skills": {"<canonical>": ["<alias>", ...]},
+         "text_scan_exclude": ["<alias>", ...]}
+
+    Raises:
+        ValueError: If the file is malformed or an alias maps to two skills.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data.get("skills"), dict) or not data.get("version"):
+        raise ValueError(f"{path}: expected 'version' and a 'skills' object")
+
+    canon: dict[str, str] = {}
+    raw: set[str] = set()
+    for name, aliases in data["skills"].items():
+        for alias in [name, *aliases]:
+            key = clean_token(alias)
+            if canon.get(key, name) != name:
+                raise ValueError(f"{path}: alias {alias!r} maps to both {canon[key]!r} and {name!r}")
+            canon[key] = name
+            raw.add(alias)
+
+    exclude = {a.lower() for a in data.get("text_scan_exclude", [])}
+    lexicon = tuple(sorted(a for a in raw if a.lower() not in exclude))
+    return Taxonomy(version=str(data["version"]), canon=canon, lexicon=lexicon)
+
+
+class SkillCanonicalizer:
+    """
+    Alias/fuzzy skill normalizer with a bounded LRU memo.
+
+    Skill tokens repeat heavily across postings ("python", "aws", ...), so
+    each distinct cleaned token is fuzzy-matched once and the answer is
+    remembered. `canonicalize_many` scores every unseen token of a batch in a
+    single `rapidfuzz.process.cdist` call instead of one `extractOne` per token.
+
+    Large vocabularies are blocked with a character-trigram index: a query is
+    only scored against the known tokens sharing the most trigrams with it.
+    At the 92 cutoff a real match shares most of its trigrams, so this keeps
+    the results while making matching cost independent of taxonomy size.
+
+    Thread-safe: extract workers share one instance across pool threads.
+    """
+
+    def __init__(
+        self,
+        canon: dict[str, str],
+        threshold: float = 92,
+        memo_size: int = 50_000,
+        block_above: int = 256,
+        max_candidates: int = 32,
+    ):
+        self.canon = dict(canon)
+        self.known = sorted(set(self.canon.values()) | set(self.canon.keys()))
+        self.skills = set(self.canon.values())
+        self.threshold = threshold
+        self.memo_size = memo_size
+        self.max_candidates = max_candidates
+        self._memo: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+        # trigram -> indexes into `known`; None when the vocabulary is small
+        # enough to score in full.
+        self._grams: dict[str, list[int]] | None = None
+        if len(self.known) > block_above:
+            self._grams = defaultdict(list)
+            for i, k in enumerate(self.known):
+                for g in _trigrams(k):
+                    self._grams[g].append(i)
+
+    @staticmethod
+    def clean(t: str) -> str:
+        return clean_token(t)
+
+    def normalize(self, t: str) -> str:
+        return self.canonicalize_many([t])[0]
+
+    def canonicalize_many(self, tokens: list[str]) -> list[str]:
+        """
+        Normalize a batch of raw tokens (same rules as `normalize_token`).
+
+        Returns:
+            One canonical token per input, in order (duplicates kept).
+        """
+        cleaned = [self.clean(t) for t in tokens]
+        out: list[str | None] = [None] * len(cleaned)
+        unseen: dict[str, list[int]] = {}
+
+        with self._lock:
+            for i, c in enumerate(cleaned):
+                if c in self.canon:
+                    out[i] = self.canon[c]
+                elif c in self._memo:
+                    self._memo.move_to_end(c)
+                    out[i] = self._memo[c]
+                else:
+                    unseen.setdefault(c, []).append(i)
+
+        if unseen:
+            queries = list(unseen)
+            for q, res in zip(queries, self._match(queries)):
+                for i in unseen[q]:
+                    out[i] = res
+            with self._lock:
+                self._memo.update(zip(queries, (out[unseen[q][0]] for q in queries)))
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+
+        return out  # type: ignore[return-value]
+
+    def _candidates(self, q: str) -> list[int]:
+        # Indexes of the known tokens sharing the most trigrams with `q`.
+        counts: dict[int, int] = defaultdict(int)
+        for g in _trigrams(q):
+            for i in self._grams.get(g, ()):
+                counts[i] += 1
+        if len(counts) <= self.max_candidates:
+            return sorted(counts)
+        top = sorted(counts, key=counts.__getitem__, reverse=True)[: self.max_candidates]
+        return sorted(top)
+
+    def _match(self, queries: list[str]) -> list[str]:
+        # Best known token per query, or the query itself below the threshold.
+        # Ties resolve to the first candidate, as with `extractOne`.
+        if self._grams is not None:
+            return self._match_blocked(queries)
+
+        try:
+            scores = process.cdist(queries, self.known, scorer=fuzz.WRatio, score_cutoff=self.threshold, workers=-1)
+        except ImportError:
+            # cdist needs numpy (a declared dependency); should it be missing,
+            # fall back to one extractOne per token.
+            return [self._match_one(q, self.known) for q in queries]
+
+        best = scores.argmax(axis=1)
+        out = []
+        for q, row, j in zip(queries, scores, best):
+            if q and row[j] >= self.threshold:
+                out.append(self.canon.get(self.known[j], self.known[j]))
+            else:
+                out.append(q)
+        return out
+
+    def _match_blocked(self, queries: list[str]) -> list[str]:
+        # Score the batch against the union of its candidate sets in one cdist
+        # call, then only look at each query's own candidates.
+        cands = [self._candidates(q) for q in queries]
+        pool = sorted({i for c in cands for i in c})
+        if not pool:
+            return list(queries)
+        choices = [self.known[i] for i in pool]
+        col = {i: j for j, i in enumerate(pool)}
+
+        try:
+            scores = process.cdist(queries, choices, scorer=fuzz.WRatio, score_cutoff=self.threshold, workers=-1)
+        except ImportError:
+            return [self._match_one(q, [self.known[i] for i in c]) for q, c in zip(queries, cands)]
+
+        out = []
+        for q, row, c in zip(queries, scores, cands):
+            best_i, best_s = None, 0.0
+            for i in c:
+                s = row[col[i]]
+                if s > best_s:
+                    best_i, best_s = i, s
+            if q and best_i is not None and best_s >= self.threshold:
+                out.append(self.canon.get(self.known[best_i], self.known[best_i]))
+            else:
+                out.append(q)
+        return out
+
+    def _match_one(self, q: str, choices: list[str]) -> str:
+        m = process.extractOne(q, choices, scorer=fuzz.WRatio, score_cutoff=self.threshold) if q else None
+        return self.canon.get(m[0], m[0]) if m else q
+
+
+def _trigrams(s: str) -> set[str]:
+    # Padded so one- and two-character tokens ("go", "c#") still get grams.
+    s = f" {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+# Process-wide taxonomy + canonicalizer. `current()` re-checks the file at
+# most every `skills_taxonomy_check_sec` and swaps in a fresh canonicalizer
+# (empty memo) when the version changes, so long-running workers pick up
+# taxonomy edits without a restart.
+_state_lock = threading.Lock()
+_taxonomy: Taxonomy | None = None
+_canonicalizer: SkillCanonicalizer | None = None
+_mtime: float | None = None
+_checked_at = 0.0
+
+def taxonomy_path() -> Path:
+    return Path(settings.skills_taxonomy_path) if settings.skills_taxonomy_path else DEFAULT_TAXONOMY_PATH
+
+def _refresh(force: bool = False) -> None:
+    global _taxonomy, _canonicalizer, _mtime, _checked_at
+    now = time.monotonic()
+    if not force and _canonicalizer is not None and now - _checked_at < settings.skills_taxonomy_check_sec:
+        return
+
+    with _state_lock:
+        if not force and _canonicalizer is not None and now - _checked_at < settings.skills_taxonomy_check_sec:
+            return
+        _checked_at = now
+        path = taxonomy_path()
+        try:
+            mtime = path.stat().st_mtime
+            if not force and _canonicalizer is not None and mtime == _mtime:
+                return
+            tax = load_taxonomy(path)
+        except (OSError, ValueError):
+            if _canonicalizer is None:
+                raise
+            # Keep serving the last good taxonomy if an edit is half-written.
+            logger.exception("skills_taxonomy_reload_failed path=%s", path)
+            return
+
+        _mtime = mtime
+        if _taxonomy is not None and tax.version == _taxonomy.version and not force:
+            return
+        if _taxonomy is not None:
+            logger.info("skills_taxonomy_reloaded %s -> %s (%d aliases)", _taxonomy.version, tax.version, len(tax.canon))
+        _taxonomy = tax
+        _canonicalizer = SkillCanonicalizer(tax.canon)
+
+def current() -> SkillCanonicalizer:
+    _refresh()
+    return _canonicalizer  # type: ignore[return-value]
+
+def current_taxonomy() -> Taxonomy:
+    _refresh()
+    return _taxonomy  # type: ignore[return-value]
+
+def reload() -> Taxonomy:
+    # Force a re-read (e.g. after writing a new taxonomy file).
+    _refresh(force=True)
+    return _taxonomy  # type: ignore[return-value]
 
-# Canonical mapping for common aliases / misspellings -> normalized skill name.
-# This helps deduplicate skill lists and improve downstream filtering/search.
-CANON = {
-    "node": "nodejs",
-    "node.js": "nodejs",
-    "nodejs": "nodejs",
-    "react.js": "react",
-    "reactjs": "react",
-    "postgres": "postgresql",
-    "postgre": "postgresql",
-    "aws": "aws",
-    "amazon web services": "aws",
-    "gcp": "gcp",
-    "google cloud": "gcp",
-    "k8s": "kubernetes",
-    "kubernetes": "kubernetes",
-    "js": "javascript",
-    "ts": "typescript",
-}
-
-# Candidate vocabulary for fuzzy matching:
-# - keys: raw aliases
-# - values: canonical outputs
-KNOWN = sorted(set(CANON.values()) | set(CANON.keys()))
 
 def normalize_token(t: str) -> str:
     """
@@ -34,8 +300,9 @@ def normalize_token(t: str) -> str:
     Steps:
     1) Lowercase + trim whitespace
     2) Remove unwanted characters (keep letters, digits, + . # -)
-    3) Apply exact canonical mapping (CANON)
+    3) Apply exact canonical mapping (taxonomy aliases)
     4) Otherwise use fuzzy matching against known tokens and canonical forms
+       (memoized and blocked; see SkillCanonicalizer)
 
     Args:
         t: Raw skill token (e.g. "Node.js", "Amazon Web Services", "K8S").
@@ -44,36 +311,18 @@ def normalize_token(t: str) -> str:
         Canonicalized token (e.g. "nodejs", "aws", "kubernetes").
         If no confident match exists, returns the cleaned token as-is.
     """
-    # Normalize casing + whitespace.
-    t = t.strip().lower()
-
-    # Replace non-allowed characters with spaces to reduce noise.
-    # Keeps common tech chars like: c++, node.js, c#, etc.
-    t = re.sub(r"[^a-z0-9.+#-]+", " ", t).strip()
-
-    # Exact canonical mapping.
-    if t in CANON:
-        return CANON[t]
+    return current().normalize(t)
 
-    # Fuzzy match against known tokens.
-    # extractOne returns (match, score, index) or None.
-    m = process.extractOne(t, KNOWN, scorer=fuzz.WRatio)
-
-    # Only accept high-confidence fuzzy matches to avoid bad merges.
-    if m and m[1] >= 92:
-        # If the matched token is an alias, map it to canonical form.
-        # If it's already canonical, return it directly.
-        return CANON.get(m[0], m[0])
-
-    # No match: return cleaned token.
-    return t
+def canonicalize_many(tokens: list[str]) -> list[str]:
+    # Batch form of `normalize_token`: one canonical token per input.
+    return current().canonicalize_many(tokens)
 
 def canonicalize(skills: list[str]) -> list[str]:
     """
     Canonicalize and deduplicate a list of skills.
 
-    - Normalizes each token
-    - Drops empty / too-short tokens
+    - Normalizes all tokens in one batch
+    - Drops empty / too-short tokens and ones longer than `MAX_SKILL_LEN`
     - Preserves original order (first occurrence wins)
     - Removes duplicates
 
@@ -85,12 +334,12 @@ def canonicalize(skills: list[str]) -> list[str]:
     """
     out: list[str] = []
     seen: set[str] = set()
+    canon = current()
 
-    for s in skills:
-        n = normalize_token(s)
-
-        # Skip empty or extremely short tokens (noise).
-        if not n or len(n) < 2:
+    for n in canon.canonicalize_many(skills):
+        # Skip empty or extremely short tokens (noise), unless the taxonomy
+        # knows them ("c", "r").
+        if not n or (len(n) < 2 and n not in canon.skills) or len(n) > MAX_SKILL_LEN:
             continue
 
         # Deduplicate while preserving order.
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import datetime as dt
+import time
+from redis import Redis
+from redis.commands.core import Script
+
+# Rate and spend limits shared by every replica of a worker pool (state lives
+# in Redis, so scaling the pool out does not multiply the allowed rate).
+
+# Token bucket refilled continuously at ARGV[1] tokens/sec up to ARGV[2].
+# Takes ARGV[4] tokens if available and returns 0, otherwise returns the
+# seconds to wait until they will be.
+#
+# KEYS[1] = bucket hash {tokens, ts}
+_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+_bucket_script: Script | None = None
+
+
+class TokenBucket:
+    def __init__(self, r: Redis, name: str, rate_per_sec: float, burst: int):
+        self.r = r
+        self.key = f"rl:{name}"
+        self.rate = rate_per_sec
+        self.burst = burst
+
+    def try_acquire(self, cost: float = 1) -> float:
+        # Take `cost` tokens if available. Returns 0 on success, otherwise the
+        # number of seconds until enough tokens will have accumulated.
+        global _bucket_script
+        if _bucket_script is None:
+            _bucket_script = self.r.register_script(_BUCKET_LUA)
+        wait = _bucket_script(keys=[self.key], args=[self.rate, self.burst, time.time(), cost], client=self.r)
+        return float(wait)
+
+    def acquire(self, cost: float = 1) -> None:
+        # Block until `cost` tokens have been taken.
+        while True:
+            wait = self.try_acquire(cost)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class DailyBudget:
+    # Per-UTC-day spend counter (e.g. LLM tokens). A limit of 0 means unlimited.
+
+    def __init__(self, r: Redis, name: str, limit: int):
+        self.r = r
+        self.name = name
+        self.limit = limit
+
+    def _key(self) -> str:
+        return f"budget:{self.name}:{dt.datetime.now(dt.timezone.utc):%Y%m%d}"
+
+    def used(self) -> int:
+        return int(self.r.get(self._key()) or 0)
+
+    def exhausted(self) -> bool:
+        return self.limit > 0 and self.used() >= self.limit
+
+    def charge(self, amount: int) -> int:
+        # Record spend; returns the day's running total.
+        key = self._key()
+        pipe = self.r.pipeline()
+        pipe.incrby(key, amount)
+        pipe.expire(key, 2 * 24 * 3600)
+        return pipe.execute()[0]
+
+    @staticmethod
+    def seconds_until_reset() -> float:
+        now = dt.datetime.now(dt.timezone.utc)
+        tomorrow = (now + dt.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - now).total_seconds()
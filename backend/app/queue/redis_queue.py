@@ -4,6 +4,8 @@ import uuid
 from dataclasses import dataclass
 from typing import Any
 from redis import Redis
+from redis.commands.core import Script
+
 
 @dataclass
 class Task:
@@ -23,21 +25,177 @@ def _now() -> float:
     return time.time()
 
 
+# Key layout per task type:
+#   q:<type>    LIST of task ids waiting to be leased
+#   p:<type>    ZSET of leased task ids, score=visibility deadline
+#   t:<type>    HASH of task id -> task JSON (payload + attempts)
+#   w:<type>    LIST of wake-up tokens, pushed whenever ids are pushed onto
+#               q:<type> (idle workers block on these, see `lease_blocking`)
+#   dlq:<type>  LIST of task JSON that exhausted their retry budget
+#
+# Keeping only ids in the list/ZSET means ack/fail address a task by id and
+# never have to reproduce the exact JSON bytes that were leased.
+
+# Most wake-up tokens kept per type: enough to wake every idle replica after
+# a fan-out, without a backlog of stale wake-ups once workers are busy.
+_WAKE_TOKENS = 64
+
+
+def _wake(pipe, task_type: str, n: int = 1) -> None:
+    # Queue wake-up tokens next to an id push. Tokens carry no data: a lost
+    # or stale token costs at most one empty lease attempt.
+    key = f"w:{task_type}"
+    pipe.lpush(key, *["1"] * min(n, _WAKE_TOKENS))
+    pipe.ltrim(key, 0, _WAKE_TOKENS - 1)
+
+
+def _task_json(task: Task) -> str:
+    return json.dumps(
+        {
+            "id": task.id,
+            "type": task.type,
+            "payload": task.payload,
+            "attempts": task.attempts,
+        }
+    )
+
+
 def enqueue(r: Redis, task_type: str, payload: dict[str, Any]) -> str:
     # Create a new task with a unique id.
-    task_id = str(uuid.uuid4())
-    task = {
-        "id": task_id,
-        "type": task_type,
-        "payload": payload,
-        "attempts": 0,
-    }
+    task = Task(id=str(uuid.uuid4()), type=task_type, payload=payload)
+
+    # Store the payload under its id, then push the id onto the left side of
+    # the list queue. Consumers pop from the right, giving FIFO-ish behavior.
+    pipe = r.pipeline()
+    pipe.hset(f"t:{task_type}", task.id, _task_json(task))
+    pipe.lpush(f"q:{task_type}", task.id)
+    _wake(pipe, task_type)
+    pipe.execute()
+
+    return task.id
 
-    # Push onto the left side of the list queue.
-    # Consumers use rpop (right-pop), giving FIFO-ish behavior.
-    r.lpush(f"q:{task_type}", json.dumps(task))
 
-    return task_id
+def enqueue_many(
+    r: Redis,
+    task_type: str,
+    payloads: list[dict[str, Any]],
+    chunk_size: int = 1000,
+) -> list[str]:
+    # Bulk version of `enqueue` for fan-out sites (one board -> many postings).
+    #
+    # Each chunk is one pipeline holding a variadic HSET of payloads and a
+    # variadic LPUSH of ids, so thousands of tasks cost a handful of round
+    # trips. Ids are pushed in payload order, so they are also leased in that
+    # order. Returns the task ids in payload order.
+    ids: list[str] = []
+
+    for i in range(0, len(payloads), chunk_size):
+        chunk = [Task(id=str(uuid.uuid4()), type=task_type, payload=p) for p in payloads[i:i + chunk_size]]
+
+        pipe = r.pipeline()
+        pipe.hset(f"t:{task_type}", mapping={t.id: _task_json(t) for t in chunk})
+        pipe.lpush(f"q:{task_type}", *[t.id for t in chunk])
+        _wake(pipe, task_type, len(chunk))
+        pipe.execute()
+
+        ids.extend(t.id for t in chunk)
+
+    return ids
+
+
+# Server-side lease: pop up to ARGV[1] ids off the main queue, record each one
+# in the processing ZSET with the deadline ARGV[2] and return the task JSON.
+# Running this as a single script makes the pop+record atomic (a worker crash
+# can no longer drop a task between the two commands) and costs one round trip
+# per batch instead of two per task.
+#
+# Entries that are still full task JSON (pushed by a producer running the
+# pre-id layout) are converted in place, so mixed deployments keep working.
+#
+# KEYS[1] = q:<type>, KEYS[2] = p:<type>, KEYS[3] = t:<type>
+_LEASE_LUA = """
+local out = {}
+
+local function take(id)
+    local raw
+    if string.sub(id, 1, 1) == '{' then
+        raw = id
+        id = cjson.decode(raw)['id']
+        redis.call('HSET', KEYS[3], id, raw)
+    else
+        raw = redis.call('HGET', KEYS[3], id)
+    end
+    -- An id without a payload was already acked; drop it.
+    if raw then
+        redis.call('ZADD', KEYS[2], ARGV[2], id)
+        out[#out + 1] = raw
+    end
+end
+
+for i = 1, tonumber(ARGV[1]) do
+    local id = redis.call('RPOP', KEYS[1])
+    if not id then
+        break
+    end
+    take(id)
+end
+return out
+"""
+
+# One-off conversion of the legacy layout (full task JSON as q:/p: members)
+# into ids + t:<type> payloads. Scores of in-flight tasks are preserved, as is
+# the order of the main queue.
+#
+# KEYS[1] = q:<type>, KEYS[2] = p:<type>, KEYS[3] = t:<type>
+_MIGRATE_LUA = """
+local moved = 0
+local items = redis.call('LRANGE', KEYS[1], 0, -1)
+local ids = {}
+for i, item in ipairs(items) do
+    if string.sub(item, 1, 1) == '{' then
+        local id = cjson.decode(item)['id']
+        redis.call('HSET', KEYS[3], id, item)
+        ids[i] = id
+        moved = moved + 1
+    else
+        ids[i] = item
+    end
+end
+if moved > 0 then
+    redis.call('DEL', KEYS[1])
+    for i = 1, #ids, 1000 do
+        redis.call('RPUSH', KEYS[1], unpack(ids, i, math.min(i + 999, #ids)))
+    end
+end
+
+local members = redis.call('ZRANGE', KEYS[2], 0, -1, 'WITHSCORES')
+for i = 1, #members, 2 do
+    local m = members[i]
+    if string.sub(m, 1, 1) == '{' then
+        local id = cjson.decode(m)['id']
+        redis.call('HSET', KEYS[3], id, m)
+        redis.call('ZREM', KEYS[2], m)
+        redis.call('ZADD', KEYS[2], members[i + 1], id)
+        moved = moved + 1
+    end
+end
+return moved
+"""
+
+# Registered lazily; redis-py's Script object runs EVALSHA and transparently
+# falls back to SCRIPT LOAD if the server's script cache was flushed.
+_scripts: dict[str, Script] = {}
+
+
+def _script(r: Redis, source: str) -> Script:
+    s = _scripts.get(source)
+    if s is None:
+        s = _scripts[source] = r.register_script(source)
+    return s
+
+
+def _keys(task_type: str) -> list[str]:
+    return [f"q:{task_type}", f"p:{task_type}", f"t:{task_type}"]
 
 
 def lease_batch(
@@ -46,45 +204,62 @@ def lease_batch(
     batch_size: int,
     visibility_timeout_sec: int,
 ) -> list[Task]:
-    # Lease up to `batch_size` tasks from the main queue and move them into
+    # Lease up to `batch_size` tasks from the main queue and move their ids into
     # a "processing" sorted set with a deadline score (visibility timeout).
     # If a worker crashes after leasing but before ack'ing, the reaper can
     # requeue tasks whose deadlines have passed.
-    tasks: list[Task] = []
+    deadline = _now() + visibility_timeout_sec
 
-    qkey = f"q:{task_type}"  # main queue list
-    pkey = f"p:{task_type}"  # processing ZSET: member=raw json, score=deadline
+    # One EVALSHA moves the whole batch atomically.
+    raws = _script(r, _LEASE_LUA)(keys=_keys(task_type), args=[batch_size, deadline], client=r)
 
-    deadline = _now() + visibility_timeout_sec
+    # Parse into structured Tasks for the worker.
+    return [Task(**json.loads(raw)) for raw in raws]
 
-    for _ in range(batch_size):
-        raw = r.rpop(qkey)
-        if raw is None:
-            break
 
-        # Record the leased item with its deadline.
-        r.zadd(pkey, {raw: deadline})
+def lease_blocking(
+    r: Redis,
+    batch_sizes: dict[str, int],
+    visibility_timeout_sec: int,
+    block_timeout_sec: int = 5,
+) -> list[Task]:
+    # Lease a batch from the first non-empty queue in `batch_sizes`, blocking
+    # up to `block_timeout_sec` when all of them are empty.
+    #
+    # `batch_sizes` maps task type -> batch size; its iteration order is the
+    # priority order. Returns tasks of a single type (check `Task.type`), or an
+    # empty list when the timeout expires with no work.
 
-        # Parse into a structured Task for the worker.
-        d = json.loads(raw)
-        tasks.append(Task(**d))
+    # Fast path: drain in priority order without blocking.
+    for task_type, batch_size in batch_sizes.items():
+        tasks = lease_batch(r, task_type, batch_size, visibility_timeout_sec)
+        if tasks:
+            return tasks
 
-    return tasks
+    # All queues empty: park on every type's wake-up list at once. BRPOP
+    # returns as soon as a producer pushes to any of them. Only the disposable
+    # token is popped here; ids are still leased exclusively by the atomic
+    # script, so a crash at any point cannot drop a task.
+    if r.brpop([f"w:{t}" for t in batch_sizes], timeout=block_timeout_sec) is None:
+        return []
 
-def ack(r: Redis, task_type: str, task: Task) -> None:
-    # Acknowledge successful processing by removing the task from processing set.
-    pkey = f"p:{task_type}"
+    # Woken: lease in priority order. Another worker may have taken the work
+    # first, in which case the caller simply waits again.
+    for task_type, batch_size in batch_sizes.items():
+        tasks = lease_batch(r, task_type, batch_size, visibility_timeout_sec)
+        if tasks:
+            return tasks
+    return []
 
-    raw = json.dumps(
-        {
-            "id": task.id,
-            "type": task.type,
-            "payload": task.payload,
-            "attempts": task.attempts,
-        }
-    )
 
-    r.zrem(pkey, raw)
+def ack(r: Redis, task_type: str, task: Task) -> None:
+    # Acknowledge successful processing: drop the id from the processing set
+    # and its payload from the side hash.
+    pipe = r.pipeline()
+    pipe.zrem(f"p:{task_type}", task.id)
+    pipe.hdel(f"t:{task_type}", task.id)
+    pipe.execute()
+
 
 def fail_and_maybe_requeue(
     r: Redis,
@@ -97,27 +272,32 @@ def fail_and_maybe_requeue(
     # - Increment attempts
     # - If attempts exceed threshold -> send to DLQ
     # - Otherwise requeue for retry
-    pkey = f"p:{task_type}"
-
-    raw = json.dumps(
-        {
-            "id": task.id,
-            "type": task.type,
-            "payload": task.payload,
-            "attempts": task.attempts,
-        }
-    )
-    r.zrem(pkey, raw)
-
     task.attempts += 1
 
+    pipe = r.pipeline()
+    pipe.zrem(f"p:{task_type}", task.id)
+
     if task.attempts >= max_attempts:
         # Dead-letter queue for tasks that exceeded retry budget.
-        r.lpush(f"dlq:{task_type}", json.dumps(task.__dict__))
-        return
+        pipe.hdel(f"t:{task_type}", task.id)
+        pipe.lpush(f"dlq:{task_type}", _task_json(task))
+    else:
+        # Persist the new attempt count and put the id back on the main queue.
+        pipe.hset(f"t:{task_type}", task.id, _task_json(task))
+        pipe.lpush(f"q:{task_type}", task.id)
+        _wake(pipe, task_type)
 
-    # Put it back on the main queue for another attempt.
-    r.lpush(f"q:{task_type}", json.dumps(task.__dict__))
+    pipe.execute()
+
+
+def release(r: Redis, task_type: str, task: Task) -> None:
+    # Give a leased task back without counting an attempt (e.g. the worker is
+    # out of budget, not failing). It goes to the back of the queue.
+    pipe = r.pipeline()
+    pipe.zrem(f"p:{task_type}", task.id)
+    pipe.lpush(f"q:{task_type}", task.id)
+    _wake(pipe, task_type)
+    pipe.execute()
 
 
 def requeue_stale(
@@ -128,7 +308,7 @@ def requeue_stale(
 ) -> int:
     # Requeue tasks whose visibility timeout has expired.
     #
-    # The "processing" ZSET stores members with score=deadline timestamp.
+    # The "processing" ZSET stores task ids with score=deadline timestamp.
     # Any tasks with score <= now are considered stale and will be moved back
     # to the main queue.
     #
@@ -141,16 +321,25 @@ def requeue_stale(
 
     now = _now()
 
-    # Fetch up to max_to_requeue expired members.
+    # Fetch up to max_to_requeue expired ids.
     stale = r.zrangebyscore(pkey, 0, now, start=0, num=max_to_requeue)
     if not stale:
         return 0
 
     # Pipeline to reduce round trips and make the move faster.
     pipe = r.pipeline()
-    for raw in stale:
-        pipe.zrem(pkey, raw)
-        pipe.lpush(qkey, raw)
+    for task_id in stale:
+        pipe.zrem(pkey, task_id)
+        pipe.lpush(qkey, task_id)
+    _wake(pipe, task_type, len(stale))
     pipe.execute()
 
     return len(stale)
+
+
+def migrate_legacy_keys(r: Redis, task_type: str) -> int:
+    # Convert q:/p: keys written by the JSON-member layout into the id layout.
+    # Run with workers stopped: a legacy worker would otherwise try to ack by
+    # JSON and its task would be redelivered after the visibility timeout.
+    # Returns the number of entries converted (0 when already migrated).
+    return int(_script(r, _MIGRATE_LUA)(keys=_keys(task_type), args=[], client=r))
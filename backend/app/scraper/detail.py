@@ -0,0 +1,28 @@
+from __future__ import annotations
+import datetime as dt
+from app.db.models import JobPosting
+from app.extract.html_text import html_to_text
+from app.utils.hashing import sha256_hex
+
+def apply_job_detail(jp: JobPosting, job: dict, force: bool = False) -> bool:
+    # Copy a Greenhouse job payload (single-job endpoint or a `content=true`
+    # board entry, which share the same shape) onto the posting.
+    #
+    # Returns True when the posting needs (re-)extraction: its text hash
+    # changed, it was never successfully extracted, or `force` is set. An
+    # already-extracted posting with byte-identical text keeps its status.
+    text = job.get("content") or ""
+    content_hash = sha256_hex(text)
+    needs_extract = force or content_hash != jp.content_hash or jp.status != "extracted"
+
+    jp.title = job.get("title") or jp.title
+    loc = (job.get("location") or {}).get("name")
+    jp.location_raw = loc or jp.location_raw
+    jp.canonical_url = job.get("absolute_url") or jp.canonical_url
+    jp.fetched_at = dt.datetime.now(dt.timezone.utc)
+    if needs_extract:
+        jp.description_text = text
+        jp.description_clean = html_to_text(text)
+        jp.content_hash = content_hash
+        jp.status = "fetched"
+    return needs_extract
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import asyncio
+from typing import Any
+import httpx
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter
+from app.core.http_client import new_async_client
+from .http import fetch_json_async
+
+FetchResult = tuple[int, dict[str, Any] | None, dict[str, Any], str]
+
+
+class ScrapeEngine:
+    # Fetches a batch of URLs concurrently on a private event loop.
+    #
+    # - one shared httpx.AsyncClient (pool limits from settings), so
+    #   connections are reused across batches
+    # - a global semaphore caps requests in flight (settings.scrape_concurrency)
+    # - a per-host semaphore keeps any single host below its own cap
+    #
+    # The loop is long-lived (not asyncio.run per batch) because the client's
+    # connection pool is bound to the loop it was first used on.
+
+    def __init__(self, concurrency: int, per_host_concurrency: int, timeout_sec: int = 20):
+        self.timeout_sec = timeout_sec
+        self.per_host_concurrency = per_host_concurrency
+        self._loop = asyncio.new_event_loop()
+        self._client = new_async_client()
+        self._sem = asyncio.Semaphore(concurrency)
+        self._host_sems: dict[str, asyncio.Semaphore] = {}
+
+    def _host_sem(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return sem
+
+    # Same retry policy as the blocking fetch_json. Slots are held per attempt,
+    # so a task sleeping in backoff does not block the rest of the batch.
+    @retry(stop=stop_after_attempt(5), wait=wait_exponential_jitter(initial=1, max=20))
+    async def _fetch(self, url: str, headers: dict[str, str] | None) -> FetchResult:
+        async with self._sem, self._host_sem(url):
+            return await fetch_json_async(self._client, url, timeout_sec=self.timeout_sec, headers=headers)
+
+    async def _fetch_all(self, urls: list[str], headers: list[dict[str, str] | None]) -> list[FetchResult | BaseException]:
+        return await asyncio.gather(*(self._fetch(u, h) for u, h in zip(urls, headers)), return_exceptions=True)
+
+    def fetch_all(
+        self,
+        urls: list[str],
+        headers: list[dict[str, str] | None] | None = None,
+    ) -> list[FetchResult | BaseException]:
+        # Results come back in the order of `urls`. A failed fetch is returned
+        # as its exception instead of raising, so callers can ack/fail per URL.
+        # `headers` optionally carries extra request headers per URL (e.g.
+        # conditional-GET validators).
+        if headers is None:
+            headers = [None] * len(urls)
+        return self._loop.run_until_complete(self._fetch_all(urls, headers))
+
+    def close(self) -> None:
+        self._loop.run_until_complete(self._client.aclose())
+        self._loop.close()
@@ -1,18 +1,21 @@
 from __future__ import annotations
 from .http import fetch_json
 
-def board_url(company_slug: str) -> str:
-    # Build the Greenhouse "jobs board" API URL for a given company slug.\
-    return f"https://boards-api.greenhouse.io/v1/boards/{company_slug}/jobs"
+def board_url(company_slug: str, content: bool = False) -> str:
+    # Build the Greenhouse "jobs board" API URL for a given company slug.
+    # With content=True the listing embeds every job's description, which makes
+    # per-job fetches unnecessary.
+    url = f"https://boards-api.greenhouse.io/v1/boards/{company_slug}/jobs"
+    return f"{url}?content=true" if content else url
 
 def job_url(company_slug: str, job_id: int) -> str:
     # Build the Greenhouse "single job" API URL for a given company slug + job id.
     return f"https://boards-api.greenhouse.io/v1/boards/{company_slug}/jobs/{job_id}"
 
-def fetch_board(company_slug: str):
+def fetch_board(company_slug: str, content: bool = False):
     # Fetch the full list of jobs from a company's Greenhouse board.
     # Returns parsed JSON (Python dict) from the Greenhouse API response.
-    return fetch_json(board_url(company_slug))
+    return fetch_json(board_url(company_slug, content=content))
 
 def fetch_job(company_slug: str, job_id: int):
     # Fetch a single job posting JSON payload from Greenhouse.
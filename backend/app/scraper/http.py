@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import Any
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential_jitter
+from app.core.http_client import get_client
 
 DEFAULT_UA = "openfunnel-takehome/0.1"
 
@@ -10,11 +11,26 @@ def fetch_json(url: str, timeout_sec: int = 20, headers: dict[str, str] | None =
     h = {"user-agent": DEFAULT_UA}
     if headers:
         h.update(headers)
-    with httpx.Client(timeout=timeout_sec, follow_redirects=True) as client:
-        r = client.get(url, headers=h)
-        content_type = r.headers.get("content-type", "")
-        try:
-            data = r.json()
-        except Exception:
-            data = None
-        return r.status_code, data, dict(r.headers), content_type
+    # Shared pooled client: retries and later calls reuse warm connections.
+    r = get_client().get(url, headers=h, timeout=timeout_sec, follow_redirects=True)
+    content_type = r.headers.get("content-type", "")
+    try:
+        data = r.json()
+    except Exception:
+        data = None
+    return r.status_code, data, dict(r.headers), content_type
+
+
+async def fetch_json_async(client: httpx.AsyncClient, url: str, timeout_sec: int = 20, headers: dict[str, str] | None = None) -> tuple[int, dict[str, Any] | None, dict[str, Any], str]:
+    # Single-attempt async counterpart of `fetch_json` on a caller-owned client.
+    # Retries and concurrency limits are applied by the caller (see app.scraper.engine).
+    h = {"user-agent": DEFAULT_UA}
+    if headers:
+        h.update(headers)
+    r = await client.get(url, headers=h, timeout=timeout_sec, follow_redirects=True)
+    content_type = r.headers.get("content-type", "")
+    try:
+        data = r.json()
+    except Exception:
+        data = None
+    return r.status_code, data, dict(r.headers), content_type
@@ -0,0 +1,43 @@
+from __future__ import annotations
+import json
+from typing import Any
+from redis import Redis
+
+# HTTP cache validators (ETag / Last-Modified) per url_hash, used to turn
+# re-crawls of unchanged boards and postings into cheap 304 responses.
+#
+# Stored in one Redis hash: field=url_hash, value=JSON {"etag", "last_modified"}.
+KEY = "http:validators"
+
+
+def _request_headers(raw: str | None) -> dict[str, str]:
+    # Build conditional request headers from a stored validator entry.
+    if not raw:
+        return {}
+    v = json.loads(raw)
+    h = {}
+    if v.get("etag"):
+        h["if-none-match"] = v["etag"]
+    if v.get("last_modified"):
+        h["if-modified-since"] = v["last_modified"]
+    return h
+
+
+def conditional_headers_many(r: Redis, url_hashes: list[str]) -> list[dict[str, str]]:
+    # One HMGET for a whole batch; returns headers in the order of `url_hashes`.
+    if not url_hashes:
+        return []
+    return [_request_headers(raw) for raw in r.hmget(KEY, url_hashes)]
+
+
+def remember(r: Redis, url_hash: str, response_headers: dict[str, Any]) -> None:
+    # Record the validators of a successfully processed 200 response.
+    # Call only after the response has been persisted: a validator stored for a
+    # response we then failed to save would make every retry a 304 and the
+    # posting would never be written.
+    h = {k.lower(): v for k, v in response_headers.items()}
+    etag = h.get("etag")
+    last_modified = h.get("last-modified")
+    if not etag and not last_modified:
+        return
+    r.hset(KEY, url_hash, json.dumps({"etag": etag, "last_modified": last_modified}))
@@ -0,0 +1,17 @@
+from __future__ import annotations
+import sys
+from app.db.redis_client import get_redis
+from app.queue.redis_queue import migrate_legacy_keys
+
+TASK_TYPES = ["discover", "scrape", "extract"]
+
+def main():
+    # Convert queues written before the id-keyed layout. Stop workers first.
+    task_types = sys.argv[1:] or TASK_TYPES
+    r = get_redis()
+    for t in task_types:
+        n = migrate_legacy_keys(r, t)
+        print(f"{t}: migrated {n} entries")
+
+if __name__ == "__main__":
+    main()
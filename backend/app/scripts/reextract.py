@@ -0,0 +1,319 @@
+"""
+Re-run extraction over postings we already hold, without re-scraping
+Greenhouse (e.g. after changing the small-model prompt or the skill taxonomy).
+
+Sources:
+    --from db   (default) the stored description of each matching posting
+    --from raw  the archived Greenhouse bodies (latest 200 response per URL):
+                descriptions are re-applied from the raw store first, then
+                extracted
+
+Postings are processed in chunks of --chunk, so memory stays bounded however
+many match (with --from raw, archived bodies are expanded one at a time).
+Each chunk is either enqueued for the extract workers (default) or, with
+--workers N, extracted in this process on N threads and written in one
+transaction per chunk. Unchanged prompts still hit the LLM cache, so a
+taxonomy-only change re-canonicalizes skills without any model calls.
+
+Usage (from backend/):
+    python -m app.scripts.reextract --company acme --company globex
+    python -m app.scripts.reextract --from raw --run <run_id> --workers 8
+    python -m app.scripts.reextract --since 2026-10-01 --status extracted --dry-run
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from sqlalchemy import func, or_, select, tuple_, update
+from app.core.logging import init_logging, get_logger
+from app.db.session import SessionLocal
+from app.db.models import JobPosting, RawResponse, Run
+from app.db.redis_client import get_redis
+from app.queue.redis_queue import enqueue_many
+from app.extract.html_text import html_to_text
+from app.extract.pipeline import high_tier_enabled, needs_escalation, prefill, run_rules, run_small, store_results
+from app.extract.schema import ExtractionLLM
+from app.scraper.detail import apply_job_detail
+from app.utils import run_stats
+from app.utils.hashing import sha256_hex
+from app.utils.raw_store import SEGMENT_PREFIX, raw_body
+
+logger = get_logger(__name__)
+
+# Company slug and (for single-job URLs) job id from a Greenhouse API URL.
+_URL_RE = re.compile(r"/boards/([^/?]+)/jobs(?:/(\d+))?")
+
+# A posting ready for extraction: (id, prompt text, title, location_raw).
+Item = tuple[uuid.UUID, str, str | None, str | None]
+
+
+def _ts(value: str) -> dt.datetime:
+    # YYYY-MM-DD or a full ISO timestamp; naive values are taken as UTC.
+    ts = dt.datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=dt.timezone.utc)
+
+
+def _posting_query(args):
+    q = select(
+        JobPosting.id, JobPosting.description_text, JobPosting.description_clean,
+        JobPosting.title, JobPosting.location_raw,
+    ).where(JobPosting.description_text.isnot(None))
+    if args.run:
+        q = q.where(JobPosting.run_id == args.run)
+    if args.company:
+        q = q.where(JobPosting.company_name.in_(args.company))
+    if args.status:
+        q = q.where(JobPosting.status.in_(args.status))
+    if args.since:
+        q = q.where(JobPosting.fetched_at >= args.since)
+    if args.until:
+        q = q.where(JobPosting.fetched_at < args.until)
+    return q
+
+
+def _raw_query(args):
+    # Latest successful response per URL; older bodies were superseded. Inline
+    # bodies (rows from before the raw archive) are loaded one at a time.
+    q = select(RawResponse.id, RawResponse.url, RawResponse.body_ref, RawResponse.fetched_at).where(
+        RawResponse.source == "greenhouse",
+        RawResponse.status_code == 200,
+        or_(RawResponse.body_ref.isnot(None), RawResponse.body.isnot(None)),
+    )
+    if args.run:
+        q = q.where(RawResponse.run_id == args.run)
+    if args.company:
+        q = q.where(or_(*(RawResponse.url.like(f"%/boards/{c}/jobs%") for c in args.company)))
+    if args.since:
+        q = q.where(RawResponse.fetched_at >= args.since)
+    if args.until:
+        q = q.where(RawResponse.fetched_at < args.until)
+    return q.distinct(RawResponse.url_hash).order_by(RawResponse.url_hash, RawResponse.fetched_at.desc())
+
+
+def _count(q) -> int:
+    with SessionLocal() as db:
+        return db.execute(select(func.count()).select_from(q.subquery())).scalar_one()
+
+
+def _stream(q, chunk: int) -> Iterator[list]:
+    # Server-side cursor: only one chunk of rows is held at a time.
+    with SessionLocal() as db:
+        yield from db.execute(q.execution_options(yield_per=chunk)).partitions()
+
+
+def from_db(rows: list) -> list[Item]:
+    # Re-clean each description (the HTML-to-text stage may have changed too)
+    # and write back only the texts that differ.
+    items: list[Item] = []
+    changed = []
+    for jid, raw, clean, title, loc in rows:
+        text = html_to_text(raw)
+        if text != clean:
+            changed.append({"id": jid, "description_clean": text})
+        if text:
+            items.append((jid, text, title, loc))
+    if changed:
+        with SessionLocal() as db:
+            db.execute(update(JobPosting), changed)
+            db.commit()
+    return items
+
+
+def _read_order(row) -> tuple:
+    # Segment records by (segment, offset), so each segment is read front to
+    # back; blobs by path; inline bodies last.
+    ref = row.body_ref
+    if ref is None:
+        return (2, "", 0)
+    if ref.startswith(SEGMENT_PREFIX):
+        name, _, offset = ref[len(SEGMENT_PREFIX):].rpartition("@")
+        return (0, name, int(offset))
+    return (1, ref, 0)
+
+
+def _body_jobs(row) -> Iterator[tuple[tuple[str, str], dict]]:
+    # ((company, external_id), job) for every described posting in one body: a
+    # `content=true` board listing carries many, a single-job body one.
+    m = _URL_RE.search(row.url)
+    if not m:
+        return
+    try:
+        if row.body_ref:
+            data = raw_body(row)
+        else:
+            # Inline body: load the full row only for these legacy responses.
+            with SessionLocal() as db:
+                data = raw_body(db.get(RawResponse, row.id))
+    except Exception:
+        logger.exception("reextract_raw_read_error", extra={"body_ref": row.body_ref})
+        return
+    if not isinstance(data, dict):
+        return
+    entries = data.get("jobs") if m.group(2) is None else [data]
+    for job in entries or []:
+        if job.get("id") is not None and job.get("content"):
+            yield (m.group(1), str(job["id"])), job
+
+
+def raw_chunks(q, chunk: int, statuses: list[str] | None, seen: set[uuid.UUID]) -> Iterator[tuple[int, list[Item]]]:
+    """
+    Replay archived bodies onto their postings, `chunk` postings at a time.
+
+    Bodies are expanded one by one and flushed whenever `chunk` postings are
+    pending, so a run over large `content=true` board listings holds one body
+    and one chunk of postings at a time.
+
+    Yields:
+        (bodies read since the previous chunk, postings ready for extraction)
+    """
+    pending: dict[tuple[str, str], tuple[dict, dt.datetime]] = {}
+    scanned = 0
+    for rows in _stream(q, chunk):
+        for row in sorted(rows, key=_read_order):
+            scanned += 1
+            for key, job in _body_jobs(row):
+                # The same posting can appear in its board and job bodies.
+                if key not in pending or pending[key][1] < row.fetched_at:
+                    pending[key] = (job, row.fetched_at)
+                if len(pending) >= chunk:
+                    yield scanned, from_raw(pending, statuses, seen)
+                    pending, scanned = {}, 0
+    yield scanned, from_raw(pending, statuses, seen)
+
+
+def from_raw(jobs: dict[tuple[str, str], tuple[dict, dt.datetime]], statuses: list[str] | None, seen: set[uuid.UUID]) -> list[Item]:
+    # Re-apply one chunk of archived job payloads to their postings.
+    if not jobs:
+        return []
+
+    items: list[Item] = []
+    with SessionLocal() as db:
+        postings = db.query(JobPosting).filter(
+            JobPosting.source == "greenhouse",
+            tuple_(JobPosting.company_name, JobPosting.external_id).in_(list(jobs)),
+        ).all()
+        for jp in postings:
+            if jp.id in seen or (statuses and jp.status not in statuses):
+                continue
+            job, fetched_at = jobs[(jp.company_name, jp.external_id)]
+            # A body older than the posting's last fetch with different text
+            # has been superseded by a newer response; leave the posting alone.
+            if jp.fetched_at and fetched_at < jp.fetched_at and sha256_hex(job["content"]) != jp.content_hash:
+                continue
+            seen.add(jp.id)
+            # Replaying is not a fetch: keep the posting's fetch time.
+            last_fetched = jp.fetched_at
+            apply_job_detail(jp, job, force=True)
+            jp.fetched_at = last_fetched
+            if jp.description_clean:
+                items.append((jp.id, jp.description_clean, jp.title, jp.location_raw))
+        db.commit()
+    return items
+
+
+def extract(item: Item) -> tuple[uuid.UUID, ExtractionLLM, str] | None:
+    jid, text, title, location_raw = item
+    try:
+        pre = prefill(title, location_raw, text)
+        parsed = run_rules(text, pre)
+        if parsed is not None:
+            return jid, parsed, "rules"
+        return jid, run_small(text, pre), "small"
+    except Exception:
+        logger.exception("reextract_error", extra={"job_posting_id": str(jid)})
+        return None
+
+
+def process(pool: ThreadPoolExecutor, r, run_id: str, items: list[Item]) -> tuple[int, int]:
+    # Extract a chunk in-process and write it in one transaction.
+    # Returns (stored, failed).
+    results = [res for res in pool.map(extract, items) if res is not None]
+    ok = store_results(results)
+    escalate = [
+        {"job_posting_id": str(jid), "run_id": run_id}
+        for jid, parsed, _ in results
+        if jid in ok and high_tier_enabled() and needs_escalation(parsed)
+    ]
+    enqueue_many(r, "extract_high", escalate)
+    run_stats.incr(
+        r, run_id,
+        extract_rules_only=sum(1 for jid, _, tier in results if jid in ok and tier == "rules"),
+        reextract_stored=len(ok),
+        reextract_failed=len(items) - len(ok),
+    )
+    return len(ok), len(items) - len(ok)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--from", dest="source", choices=("db", "raw"), default="db")
+    ap.add_argument("--run", type=uuid.UUID, help="only postings (db) or responses (raw) of this run")
+    ap.add_argument("--company", action="append", help="company slug (repeatable)")
+    ap.add_argument("--status", action="append", help="posting status, e.g. extracted or failed (repeatable)")
+    ap.add_argument("--since", type=_ts, help="fetched at or after (YYYY-MM-DD or ISO timestamp)")
+    ap.add_argument("--until", type=_ts, help="fetched before")
+    ap.add_argument("--workers", type=int, default=0, help="extract in-process on N threads instead of enqueuing")
+    ap.add_argument("--chunk", type=int, default=500, help="postings per chunk")
+    ap.add_argument("--dry-run", action="store_true", help="only count what would be replayed")
+    args = ap.parse_args()
+    init_logging("reextract")
+
+    q = _posting_query(args) if args.source == "db" else _raw_query(args)
+    total = _count(q)
+    unit = "postings" if args.source == "db" else "bodies"
+    if args.dry_run or not total:
+        print(f"{total:,} {unit} match")
+        return
+
+    r = get_redis()
+    with SessionLocal() as db:
+        run = Run(note=f"reextract {dt.datetime.now().isoformat()} from={args.source} {unit}={total}")
+        db.add(run)
+        db.commit()
+        run_id = str(run.id)
+    mode = f"in-process ({args.workers} workers)" if args.workers else "enqueue"
+    print(f"replaying {total:,} {unit} from {args.source}, {mode} (run {run_id})", flush=True)
+
+    pool = ThreadPoolExecutor(max_workers=args.workers) if args.workers else None
+    seen: set[uuid.UUID] = set()
+    scanned = postings = stored = failed = 0
+    t0 = time.perf_counter()
+    try:
+        if args.source == "db":
+            chunks = ((len(rows), from_db(rows)) for rows in _stream(q, args.chunk))
+        else:
+            chunks = raw_chunks(q, args.chunk, args.status, seen)
+        for n_rows, items in chunks:
+            if pool is not None:
+                ok, bad = process(pool, r, run_id, items)
+                stored += ok
+                failed += bad
+            else:
+                enqueue_many(r, "extract", [{"job_posting_id": str(jid), "run_id": run_id} for jid, *_ in items])
+                run_stats.incr(r, run_id, extract_enqueued=len(items))
+
+            scanned += n_rows
+            postings += len(items)
+            elapsed = time.perf_counter() - t0
+            rate = scanned / elapsed if elapsed else 0.0
+            eta = (total - scanned) / rate if rate else 0.0
+            extra = f"  stored {stored:,}  failed {failed:,}" if pool is not None else f"  enqueued {postings:,}"
+            print(
+                f"{scanned:,}/{total:,} {unit} ({100 * scanned / total:.0f}%)  postings {postings:,}{extra}"
+                f"  {postings / elapsed if elapsed else 0.0:,.1f} postings/s  eta {eta:,.0f}s",
+                flush=True,
+            )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - t0
+    print(f"done: {postings:,} postings from {scanned:,} {unit} in {elapsed:,.1f}s (run {run_id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from __future__ import annotations
 import datetime as dt
+import sys
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.db.models import Run
 from app.db.redis_client import get_redis
-from app.queue.redis_queue import enqueue
+from app.queue.redis_queue import enqueue_many
 from importlib.resources import files
 
 SEED_FILE = files("app.seed").joinpath("greenhouse_companies.txt")
@@ -16,9 +17,10 @@ def main():
     db: Session = SessionLocal()
     run = Run(note=f"seed {dt.datetime.now().isoformat()} companies={len(companies)}")
     db.add(run); db.commit()
-    for c in companies:
-        enqueue(r, "discover", {"source": "greenhouse", "company": c, "run_id": str(run.id)})
-    print(f"enqueued {len(companies)} discovery tasks")
+    # --force re-extracts postings even when their text is unchanged.
+    force = "--force" in sys.argv[1:]
+    enqueue_many(r, "discover", [{"source": "greenhouse", "company": c, "run_id": str(run.id), "force": force} for c in companies])
+    print(f"enqueued {len(companies)} discovery tasks (run {run.id})")
     db.close()
 
 if __name__ == "__main__":
@@ -1,16 +1,6 @@
 from __future__ import annotations
-import json
+from app.extract.parse import extract_json
 
 def parse_json(text: str) -> dict:
-    text = text.strip()
-
-    try:
-        return json.loads(text)
-    except Exception:
-        pass
-
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1:
-        raise ValueError("No JSON object found in model output")
-    return json.loads(text[start:end + 1])
+    # Shared with the worker pipeline: single-pass object scan + defect repair.
+    return extract_json(text)
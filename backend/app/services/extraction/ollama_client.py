@@ -1,6 +1,8 @@
 from __future__ import annotations
 from typing import Any
-import httpx
+from app.core.http_client import get_client
+from app.llm.cache import cached_chat
+from .prompting import EXTRACTION_PROMPT_VERSION
 
 def ollama_chat(
         *,
@@ -8,11 +10,16 @@ def ollama_chat(
         model: str,
         prompt: str,
         timeout_sec: int = 60,
+        prompt_version: str = EXTRACTION_PROMPT_VERSION,
 ) -> str:
     url = f"{base_url.rstrip('/')}/api/generate"
-    payload = {"model": model, "prompt": prompt, "stream": False}
-    r = httpx.post(url, json=payload, timeout=timeout_sec)
-    r.raise_for_status()
-    data: dict[str, Any] = r.json()
-    return data.get("response", "")
+
+    def _generate(p: str) -> str:
+        payload = {"model": model, "prompt": p, "stream": False}
+        r = get_client().post(url, json=payload, timeout=timeout_sec)
+        r.raise_for_status()
+        data: dict[str, Any] = r.json()
+        return data.get("response", "")
+
+    return cached_chat(_generate, prompt, model=model, prompt_version=prompt_version)
 
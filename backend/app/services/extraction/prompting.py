@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+# Part of the LLM response cache key; bump when the template changes.
+EXTRACTION_PROMPT_VERSION = "1"
+
 
 def build_extraction_prompt(*, html_text: str) -> str:
     return f"""
@@ -1,10 +1,12 @@
 from __future__ import annotations
 import hashlib
+import uuid
 from datetime import datetime as dt
-from typing import Any, Optional, Tuple
-from sqlalchemy import select
+from typing import Any, Mapping, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.db.models import JobPosting, RawResponse, Extraction, Skill, JobSkill
+from app.db.models import JobPosting, RawResponse, Skill, JobSkill
 
 def _sha256(text: str) -> str:
     return hashlib.sha256(text.encode()).hexdigest()
@@ -101,69 +103,63 @@ def store_raw_response(
     return rr
 
 
-def store_extraction(
-    db: Session,
-    *,
-    job_posting_id,
-    extraction_fields: dict[str, Any],
-    extra_json: Optional[dict[str, Any]] = None,
-) -> Extraction:
-    # upsert extraction (1 per job_posting)
-    existing = db.execute(
-        select(Extraction).where(Extraction.job_posting_id == job_posting_id)
-    ).scalars().first()
-
-    if existing:
-        ext = existing
-    else:
-        ext = Extraction(job_posting_id=job_posting_id)
-        db.add(ext)
-
-    # set modeled fields if present
-    for k, v in extraction_fields.items():
-        if hasattr(ext, k):
-            setattr(ext, k, v)
-
-    if extra_json is not None:
-        ext.extra_json = extra_json
-
-    ext.extracted_at = dt.utcnow()
-
-    # update job posting lifecycle
-    jp = db.get(JobPosting, job_posting_id)
-    if jp:
-        jp.status = "extracted"
-        jp.extracted_at = dt.utcnow()
-
-    db.flush()
-    return ext
-
 def upsert_skills_and_links(
     db: Session,
     *,
     job_posting_id,
     canonical_skill_names: list[str],
+    replace: bool = False,
 ) -> None:
-    cleaned = sorted({s.strip().lower() for s in canonical_skill_names if s and s.strip()})
-    if not cleaned:
-        return
-
-    existing_skills = db.execute(select(Skill).where(Skill.canonical_name.in_(cleaned))).scalars().all()
-    existing_map = {s.canonical_name: s for s in existing_skills}
-
-    for name in cleaned:
-        if name not in existing_map:
-            skill = Skill(canonical_name=name)
-            db.add(skill)
-            db.flush()
-            existing_map[name] = skill
-
-        # link (ignore duplicates by checking first)
-        already = db.execute(
-            select(JobSkill).where(JobSkill.job_posting_id == job_posting_id, JobSkill.skill_id == existing_map[name].id)
-        ).scalars().first()
+    upsert_skills_and_links_many(db, skills_by_posting={job_posting_id: canonical_skill_names}, replace=replace)
 
-        if not already:
-            db.add(JobSkill(job_posting_id=job_posting_id, skill_id=existing_map[name].id))
-
-    db.flush()
+def upsert_skills_and_links_many(
+    db: Session,
+    *,
+    skills_by_posting: Mapping[Any, list[str]],
+    replace: bool = False,
+) -> None:
+    """
+    Write the skill graph for many postings in a constant number of statements.
+
+    1) INSERT ... ON CONFLICT DO NOTHING RETURNING for all skill names at once
+    2) one SELECT for names that already existed (skipped if none)
+    3) with `replace`, one DELETE of the postings' previous links
+    4) one multi-row INSERT of links, ignoring duplicates
+
+    Args:
+        skills_by_posting: job_posting_id -> canonical skill names.
+        replace: Make each posting's links exactly the given skills (used on
+                 re-extraction) instead of only adding missing links.
+    """
+    # Names that do not fit the column would fail the whole write.
+    max_len = Skill.canonical_name.type.length
+    cleaned = {
+        jid: sorted({n for n in (s.strip().lower() for s in names if s) if n and len(n) <= max_len})
+        for jid, names in skills_by_posting.items()
+    }
+    names = sorted({n for ns in cleaned.values() for n in ns})
+
+    ids: dict[str, Any] = {}
+    if names:
+        # RETURNING only yields the rows this statement inserted.
+        ins = (
+            pg_insert(Skill)
+            .values([{"id": uuid.uuid4(), "canonical_name": n} for n in names])
+            .on_conflict_do_nothing(index_elements=[Skill.canonical_name])
+            .returning(Skill.canonical_name, Skill.id)
+        )
+        ids.update(db.execute(ins).tuples().all())
+        missing = [n for n in names if n not in ids]
+        if missing:
+            ids.update(db.execute(select(Skill.canonical_name, Skill.id).where(Skill.canonical_name.in_(missing))).tuples().all())
+
+    if replace and cleaned:
+        db.execute(delete(JobSkill).where(JobSkill.job_posting_id.in_(list(cleaned))))
+
+    links = [{"job_posting_id": jid, "skill_id": ids[n]} for jid, ns in cleaned.items() for n in ns]
+    if links:
+        db.execute(
+            pg_insert(JobSkill)
+            .values(links)
+            .on_conflict_do_nothing(index_elements=[JobSkill.job_posting_id, JobSkill.skill_id])
+        )
@@ -0,0 +1,268 @@
+from __future__ import annotations
+import atexit
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterator
+from app.core.config import settings
+from app.utils.raw_store import SEGMENT_PREFIX, _codec, _compress, _decompress
+
+# Append-only segment backend for the raw archive.
+#
+# Each writer process appends records to its own rolling segment file
+# (`{raw_store_dir}/segments/<name>.seg`) and a fixed-width offset index next
+# to it (`<name>.idx`). A full replay then reads a few large files
+# sequentially instead of opening millions of small ones, and backups copy
+# whole segments.
+#
+# Record:  MAGIC | codec (1 byte) | body length (u32) | compressed body
+# Index:   url_hash (64 ascii bytes) | fetched_at (f64 epoch) | offset (u64) | record length (u32)
+#
+# The index entry is written after its record, so a crash can at worst leave
+# an unindexed tail, which readers ignore (`rebuild_index` recovers it).
+# References look like "seg/<name>@<offset>".
+
+MAGIC = b"RSG1"
+_HEADER = struct.Struct("<4sBI")
+_INDEX = struct.Struct("<64sdQI")
+_CODECS = {"gzip": 0, "zstd": 1}
+_CODEC_NAMES = {v: k for k, v in _CODECS.items()}
+
+
+def segments_dir() -> str:
+    return os.path.join(settings.raw_store_dir, "segments")
+
+
+@dataclass
+class IndexEntry:
+    url_hash: str
+    fetched_at: float
+    segment: str
+    offset: int
+    length: int
+
+    @property
+    def ref(self) -> str:
+        return f"{SEGMENT_PREFIX}{self.segment}@{self.offset}"
+
+
+def _create(path: str):
+    # Fails with FileExistsError rather than appending to another writer's file.
+    return os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644), "ab")
+
+
+class SegmentWriter:
+    """
+    Appends records to this process's current segment, rolling over to a new
+    one after `max_bytes`. Thread-safe.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._name: str | None = None
+        self._data = None
+        self._index = None
+
+    def _roll(self) -> None:
+        self.close()
+        os.makedirs(self.root, exist_ok=True)
+        self._seq += 1
+        # Sortable by creation time and unique across writers: replicas share
+        # the archive volume and all run as PID 1 in their containers, so the
+        # name carries a random id and the files are created exclusively.
+        self._name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:16]}-{self._seq:04d}"
+        self._data = _create(os.path.join(self.root, self._name + ".seg"))
+        self._index = _create(os.path.join(self.root, self._name + ".idx"))
+
+    def append(self, body: bytes, url_hash: str | None, fetched_at: float | None) -> str:
+        codec = _codec()
+        payload = _compress(body, codec)
+        record = _HEADER.pack(MAGIC, _CODECS[codec], len(payload)) + payload
+
+        with self._lock:
+            if self._data is None or self._data.tell() + len(record) > self.max_bytes:
+                self._roll()
+            offset = self._data.tell()
+            self._data.write(record)
+            self._data.flush()
+            self._index.write(_INDEX.pack(
+                (url_hash or "").encode("ascii"),
+                fetched_at if fetched_at is not None else time.time(),
+                offset,
+                len(record),
+            ))
+            self._index.flush()
+            return f"{SEGMENT_PREFIX}{self._name}@{offset}"
+
+    def close(self) -> None:
+        for f in (self._data, self._index):
+            if f is not None:
+                f.close()
+        self._data = self._index = None
+
+
+class SegmentReader:
+    """
+    Memory-mapped view of one segment. Records are decoded straight from the
+    mapping, so random access and full scans never load a whole segment into
+    memory; the OS pages data in (and out) as needed.
+    """
+
+    def __init__(self, name: str, root: str | None = None):
+        self.name = name
+        self.root = root or segments_dir()
+        self._f = open(os.path.join(self.root, name + ".seg"), "rb")
+        self._mm = self._map()
+
+    def _map(self) -> mmap.mmap | None:
+        size = os.fstat(self._f.fileno()).st_size
+        return mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def _remap(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = self._map()
+
+    def read(self, offset: int) -> bytes:
+        if self._mm is None or offset + _HEADER.size > len(self._mm):
+            # The segment is still being written to; remap to see new records.
+            self._remap()
+        if self._mm is None or offset + _HEADER.size > len(self._mm):
+            raise ValueError(f"no record at {self.name}@{offset}")
+        magic, codec, length = _HEADER.unpack_from(self._mm, offset)
+        if magic != MAGIC:
+            raise ValueError(f"no record at {self.name}@{offset}")
+        start = offset + _HEADER.size
+        if start + length > len(self._mm):
+            # Header mapped but the body was appended after the last map.
+            self._remap()
+            if start + length > len(self._mm):
+                raise ValueError(f"truncated record at {self.name}@{offset}")
+        return _decompress(self._mm[start:start + length], _CODEC_NAMES[codec])
+
+    def index(self) -> Iterator[IndexEntry]:
+        yield from read_index(self.name, self.root)
+
+    def __iter__(self) -> Iterator[tuple[IndexEntry, bytes]]:
+        # Sequential scan in write order.
+        for entry in self.index():
+            yield entry, self.read(entry.offset)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._f.close()
+
+
+def read_index(name: str, root: str | None = None) -> Iterator[IndexEntry]:
+    path = os.path.join(root or segments_dir(), name + ".idx")
+    with open(path, "rb") as f:
+        data = f.read()
+    # A torn final entry (crash mid-write) is ignored.
+    usable = len(data) - len(data) % _INDEX.size
+    for url_hash, fetched_at, offset, length in _INDEX.iter_unpack(data[:usable]):
+        yield IndexEntry(url_hash.rstrip(b"\0").decode("ascii"), fetched_at, name, offset, length)
+
+
+def rebuild_index(name: str, root: str | None = None) -> int:
+    """
+    Rewrite a segment's index by walking its records (after a crash, or if
+    the .idx was lost). url_hash / fetched_at are kept from the old index
+    where present. Returns the number of records indexed.
+    """
+    root = root or segments_dir()
+    try:
+        old = {e.offset: e for e in read_index(name, root)}
+    except FileNotFoundError:
+        old = {}
+
+    entries = []
+    with open(os.path.join(root, name + ".seg"), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = 0
+        while offset + _HEADER.size <= len(mm):
+            magic, _, length = _HEADER.unpack_from(mm, offset)
+            end = offset + _HEADER.size + length
+            if magic != MAGIC or end > len(mm):
+                break
+            prev = old.get(offset)
+            entries.append(_INDEX.pack(
+                (prev.url_hash if prev else "").encode("ascii"),
+                prev.fetched_at if prev else 0.0,
+                offset,
+                end - offset,
+            ))
+            offset = end
+
+    tmp = os.path.join(root, name + ".idx.tmp")
+    with open(tmp, "wb") as f:
+        f.write(b"".join(entries))
+    os.replace(tmp, os.path.join(root, name + ".idx"))
+    return len(entries)
+
+
+def list_segments(root: str | None = None) -> list[str]:
+    root = root or segments_dir()
+    if not os.path.isdir(root):
+        return []
+    return sorted(n[:-4] for n in os.listdir(root) if n.endswith(".seg"))
+
+
+def scan(
+    since: float | None = None,
+    until: float | None = None,
+    url_hashes: set[str] | None = None,
+    root: str | None = None,
+) -> Iterator[tuple[IndexEntry, bytes]]:
+    """
+    Stream (entry, body) for every stored record, segment by segment in
+    write order, optionally filtered by fetch time and url_hash. Filters are
+    applied to the index, so skipped records are never read.
+    """
+    for name in list_segments(root):
+        reader = SegmentReader(name, root)
+        try:
+            for entry in reader.index():
+                if since is not None and entry.fetched_at < since:
+                    continue
+                if until is not None and entry.fetched_at >= until:
+                    continue
+                if url_hashes is not None and entry.url_hash not in url_hashes:
+                    continue
+                yield entry, reader.read(entry.offset)
+        finally:
+            reader.close()
+
+
+# Process-wide writer and a small cache of open readers for `read(ref)`.
+_writer: SegmentWriter | None = None
+_readers: dict[str, SegmentReader] = {}
+_lock = threading.Lock()
+
+
+def append(body: bytes, url_hash: str | None = None, fetched_at: float | None = None) -> str:
+    global _writer
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = SegmentWriter(segments_dir(), settings.raw_segment_max_mb * 1024 * 1024)
+                atexit.register(_writer.close)
+    return _writer.append(body, url_hash, fetched_at)
+
+
+def read(ref: str) -> bytes:
+    # Random access by reference ("seg/<name>@<offset>").
+    name, _, offset = ref[len(SEGMENT_PREFIX):].rpartition("@")
+    with _lock:
+        reader = _readers.get(name)
+        if reader is None:
+            if len(_readers) >= 16:
+                _readers.pop(next(iter(_readers))).close()
+            reader = _readers[name] = SegmentReader(name)
+        return reader.read(int(offset))
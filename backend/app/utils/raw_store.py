@@ -1,9 +1,133 @@
-import os, json
+from __future__ import annotations
+import gzip
+import hashlib
+import os
+import tempfile
+import orjson
 from app.core.config import settings
 
-def store_json(url_hash: str, obj: dict) -> str:
-    os.makedirs(settings.raw_store_dir, exist_ok=True)
-    path = os.path.join(settings.raw_store_dir, f"{url_hash}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f)
-    return path
+# Content-addressed archive of raw fetch bodies.
+#
+# Each body is serialized compactly, hashed (sha256) and stored once as a
+# compressed blob under a two-level fan-out:
+#
+#     {raw_store_dir}/blobs/ab/cd/abcd…ef.json.zst   (or .json.gz)
+#
+# Identical bodies (re-fetches of an unchanged posting, boards that did not
+# move) map to the same blob and are written only once. Writes go to a temp
+# file in the target directory and are renamed into place, so readers never
+# see a partial blob. RawResponse rows keep only the returned reference.
+#
+# Millions of small files are slow to back up and list, so an append-only
+# segment backend (app.utils.raw_segments) can be selected instead with
+# `raw_store_backend = "segments"`; references say which backend holds them.
+
+_EXTS = {"zstd": ".json.zst", "gzip": ".json.gz"}
+SEGMENT_PREFIX = "seg/"
+
+
+def _codec() -> str:
+    # zstd needs the optional `zstandard` package; fall back to gzip without it.
+    if settings.raw_store_codec == "gzip":
+        return "gzip"
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        if settings.raw_store_codec == "zstd":
+            raise
+        return "gzip"
+    return "zstd"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=settings.raw_store_level).compress(data)
+    return gzip.compress(data, compresslevel=min(settings.raw_store_level, 9), mtime=0)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        # Bodies are small and the frame carries its size.
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _blob_dir(checksum: str) -> str:
+    return os.path.join(checksum[:2], checksum[2:4])
+
+
+def blob_path(ref: str) -> str:
+    return os.path.join(settings.raw_store_dir, "blobs", ref)
+
+
+def store_json(obj, url_hash: str | None = None, fetched_at: float | None = None) -> str:
+    """
+    Archive a JSON body and return its reference.
+
+    With `raw_store_backend = "segments"` the body is appended to a rolling
+    segment file instead (see app.utils.raw_segments), indexed by
+    `url_hash` and `fetched_at` (epoch seconds, default now).
+
+    Args:
+        obj: The decoded response body.
+        url_hash: sha256 of the fetched URL (segment index key).
+        fetched_at: Fetch time (segment index key).
+
+    Returns:
+        The reference for `RawResponse.body_ref`: a blob path relative to the
+        blob root ("ab/cd/<sha256>.json.zst") or a segment record
+        ("seg/<segment>@<offset>").
+    """
+    if settings.raw_store_backend == "segments":
+        from app.utils import raw_segments
+        return raw_segments.append(orjson.dumps(obj), url_hash, fetched_at)
+
+    data = orjson.dumps(obj)
+    checksum = hashlib.sha256(data).hexdigest()
+    rel_dir = _blob_dir(checksum)
+
+    # Dedup: an identical body may already be stored, possibly with the
+    # other codec if the setting changed.
+    for ext in _EXTS.values():
+        ref = os.path.join(rel_dir, checksum + ext)
+        if os.path.exists(blob_path(ref)):
+            return ref
+
+    codec = _codec()
+    ref = os.path.join(rel_dir, checksum + _EXTS[codec])
+    path = blob_path(ref)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_compress(data, codec))
+        # Atomic on POSIX; a concurrent writer of the same body just replaces
+        # an identical file.
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return ref
+
+
+def load_json(ref: str):
+    if ref.startswith(SEGMENT_PREFIX):
+        from app.utils import raw_segments
+        return orjson.loads(raw_segments.read(ref))
+    with open(blob_path(ref), "rb") as f:
+        codec = "zstd" if ref.endswith(_EXTS["zstd"]) else "gzip"
+        return orjson.loads(_decompress(f.read(), codec))
+
+
+def raw_body(rr):
+    # Body of a RawResponse: archived blob, or the inline JSON of rows written
+    # before the archive existed.
+    if rr.body_ref:
+        return load_json(rr.body_ref)
+    return rr.body
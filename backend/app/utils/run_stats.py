@@ -0,0 +1,19 @@
+from redis import Redis
+
+# Per-run pipeline counters (e.g. postings re-extracted vs. skipped), kept in a
+# Redis hash so every worker replica contributes to the same totals.
+
+def _key(run_id: str | None) -> str:
+    return f"stats:run:{run_id or 'adhoc'}"
+
+def incr(r: Redis, run_id: str | None, **counts: int) -> None:
+    counts = {k: v for k, v in counts.items() if v}
+    if not counts:
+        return
+    pipe = r.pipeline()
+    for field, n in counts.items():
+        pipe.hincrby(_key(run_id), field, n)
+    pipe.execute()
+
+def get(r: Redis, run_id: str | None) -> dict[str, int]:
+    return {k: int(v) for k, v in r.hgetall(_key(run_id)).items()}
@@ -0,0 +1,77 @@
+from __future__ import annotations
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from app.core.logging import init_logging, get_logger
+from app.core.config import settings
+from app.db.redis_client import get_redis
+from app.queue.redis_queue import Task, lease_blocking, ack, fail_and_maybe_requeue, release
+from app.queue.limits import DailyBudget, TokenBucket
+from app.extract.microbatch import estimate_tokens
+from app.extract.pipeline import load_text, run_high, store_result
+from app.llm.high_tier import chat_with_usage
+
+# Upgrades low-confidence small-model extractions with the paid tier.
+#
+# Runs as its own pool, fed by the extract worker through the `extract_high`
+# queue, so a slow or rate-limited provider never stalls small-model
+# throughput. Provider calls are paced by a token bucket and capped by a daily
+# token budget charged with the usage the provider reports, both shared across
+# replicas through Redis; answers served from the LLM cache cost nothing.
+
+init_logging("worker_extract_high")
+logger = get_logger(__name__)
+r = get_redis()
+
+bucket = TokenBucket(r, "high_tier", settings.high_tier_rps, settings.high_tier_burst)
+budget = DailyBudget(r, "high_tier_tokens", settings.high_tier_daily_token_budget)
+
+def metered_chat(prompt: str) -> str:
+    # Only cache misses get here: pace the provider call and charge the tokens
+    # it reports (estimated when the response carries no usage).
+    bucket.acquire()
+    text, tokens = chat_with_usage(prompt)
+    budget.charge(tokens if tokens is not None else estimate_tokens(prompt) + estimate_tokens(text))
+    return text
+
+def upgrade_one(t: Task) -> None:
+    try:
+        jid = uuid.UUID(t.payload["job_posting_id"])
+        text = load_text(jid)
+        if not text:
+            ack(r, "extract_high", t)
+            return
+
+        if budget.exhausted():
+            # Ran out while this task was leased: hand it back for tomorrow
+            # without burning a retry attempt.
+            release(r, "extract_high", t)
+            return
+
+        parsed = run_high(text, metered_chat)
+
+        if store_result(jid, parsed, tier="high"):
+            ack(r, "extract_high", t)
+        else:
+            fail_and_maybe_requeue(r, "extract_high", t)
+
+    except Exception:
+        logger.exception("extract_high_error", extra={"task_id": t.id})
+        fail_and_maybe_requeue(r, "extract_high", t)
+
+def main():
+    pool = ThreadPoolExecutor(max_workers=settings.high_tier_concurrency, thread_name_prefix="extract_high")
+    while True:
+        if budget.exhausted():
+            logger.warning("high_tier_budget_exhausted used=%d limit=%d", budget.used(), budget.limit)
+            # Re-check at least every minute in case the limit is raised.
+            time.sleep(min(60, budget.seconds_until_reset()))
+            continue
+
+        tasks = lease_blocking(r, {"extract_high": settings.high_tier_concurrency}, visibility_timeout_sec=settings.visibility_timeout_sec, block_timeout_sec=settings.lease_block_timeout_sec)
+        if not tasks:
+            continue
+        list(pool.map(upgrade_one, tasks))
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,201 @@
 from __future__ import annotations
-import datetime as dt, time
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from app.core.logging import init_logging, get_logger
 from app.core.config import settings
-from app.db.session import SessionLocal
-from app.db.models import JobPosting
 from app.db.redis_client import get_redis
-from app.queue.redis_queue import lease_batch, ack, fail_and_maybe_requeue
-from app.llm.ollama_client import chat as ollama_chat
-from app.llm.high_tier import chat as high_tier_chat
-from app.extract.prompts import small_model_prompt, high_tier_prompt
-from app.extract.parse import extract_json
+from app.queue.redis_queue import Task, lease_batch, lease_blocking, ack, fail_and_maybe_requeue, enqueue_many
+from app.extract.microbatch import pack
+from app.extract.pipeline import (
+    high_tier_enabled, known_fields, load_postings, merge_known, needs_escalation, prefill,
+    run_rules, run_small, run_small_batch, store_results,
+)
+from app.extract.rules import Prefill
 from app.extract.schema import ExtractionLLM
-from app.normalize.skills import canonicalize
+from app.utils import run_stats
 
 init_logging("worker_extract")
 logger = get_logger(__name__)
 r = get_redis()
 
-def needs_escalation(parsed: ExtractionLLM) -> bool:
-    if not parsed.role_function or parsed.role_function == "other":
-        return True
-    if len(parsed.skills) < 2:
-        return True
-    return False
+# A leased task with its prefetched posting: (task, id, prompt text, title, location_raw).
+Work = tuple[Task, uuid.UUID, str, str | None, str | None]
+# A finished task waiting to be written: (task, id, result, tier).
+Done = tuple[Task, uuid.UUID, ExtractionLLM, str]
 
-while True:
-    tasks = lease_batch(r, "extract", batch_size=settings.extract_batch_size, visibility_timeout_sec=settings.visibility_timeout_sec)
-    if not tasks:
-        time.sleep(0.5); continue
+def run_rules_or_small(t: Task, text: str, pre: Prefill | None) -> tuple[ExtractionLLM, str]:
+    # Returns (result, tier); postings fully covered by the rules never reach
+    # the model when extract_rules_skip_llm is on.
+    parsed = run_rules(text, pre)
+    if parsed is not None:
+        run_stats.incr(r, t.payload.get("run_id"), extract_rules_only=1)
+        return parsed, "rules"
+    return run_small(text, pre), "small"
 
+def prefetch(tasks: list[Task]) -> list[Work]:
+    # Load every posting of a leased batch in one query. Tasks whose posting
+    # is gone or has no text are acked here; nothing to extract.
+    jids: dict[str, uuid.UUID] = {}
     for t in tasks:
-        db = SessionLocal()
         try:
-            jid = t.payload["job_posting_id"]
-            jp = db.query(JobPosting).filter(JobPosting.id==jid).first()
-            if not jp or not jp.description_text:
-                ack(r, "extract", t); continue
-
-            raw1 = ollama_chat(small_model_prompt(jp.description_text))
-            data1 = extract_json(raw1)
-            parsed1 = ExtractionLLM.model_validate(data1)
-
-            parsed = parsed1
-            if (settings.openai_api_key or settings.anthropic_api_key) and needs_escalation(parsed1):
-                print("high tier")
-                raw2 = high_tier_chat(high_tier_prompt(jp.description_text))
-                data2 = extract_json(raw2)
-                parsed = ExtractionLLM.model_validate(data2)
-
-            skills = canonicalize(parsed.skills)
-            jp.summary = parsed.summary
-            jp.role_function = parsed.role_function
-            jp.seniority = parsed.seniority
-            jp.location_city = parsed.location_city
-            jp.location_state = parsed.location_state
-            jp.location_country = parsed.location_country
-            jp.salary_min = parsed.salary_min
-            jp.salary_max = parsed.salary_max
-            jp.salary_currency = parsed.salary_currency
-            jp.skills = skills
-            jp.technologies = skills[:12]
-            jp.status = "extracted"
-            jp.extracted_at = dt.datetime.now(dt.timezone.utc)
-            db.commit()
+            jids[t.id] = uuid.UUID(t.payload["job_posting_id"])
+        except Exception:
+            logger.exception("extract_bad_payload", extra={"task_id": t.id})
+            fail_and_maybe_requeue(r, "extract", t)
+
+    try:
+        rows = load_postings(list(set(jids.values()))) if jids else {}
+    except Exception:
+        logger.exception("extract_prefetch_error")
+        for t in tasks:
+            if t.id in jids:
+                fail_and_maybe_requeue(r, "extract", t)
+        return []
 
+    work: list[Work] = []
+    for t in tasks:
+        if t.id not in jids:
+            continue
+        text, title, location_raw = rows.get(jids[t.id], (None, None, None))
+        if text:
+            work.append((t, jids[t.id], text, title, location_raw))
+        else:
             ack(r, "extract", t)
+    return work
+
+def extract_one(item: Work) -> list[Done]:
+    # Model stage for one posting. Runs on a pool thread and never touches
+    # the DB, so a connection is never held while waiting on a model.
+    t, jid, text, title, location_raw = item
+    try:
+        parsed, tier = run_rules_or_small(t, text, prefill(title, location_raw, text))
+        return [(t, jid, parsed, tier)]
+    except Exception:
+        logger.exception("extract_error", extra={"task_id": t.id})
+        fail_and_maybe_requeue(r, "extract", t)
+        return []
 
+def extract_group(items: list[Work]) -> list[Done]:
+    # Micro-batched variant of `extract_one`: postings are packed into prompts
+    # up to the token budget, and each posting whose slice does not validate
+    # falls back to its own prompt. Failures are handled per task.
+    out: list[Done] = []
+    pres: dict[str, Prefill | None] = {}
+    pending: list[tuple[Work, str]] = []
+    for item in items:
+        t, jid, text, title, location_raw = item
+        try:
+            pres[t.id] = pre = prefill(title, location_raw, text)
+            parsed = run_rules(text, pre)
+            if parsed is None:
+                pending.append((item, text))
+                continue
+            run_stats.incr(r, t.payload.get("run_id"), extract_rules_only=1)
+            out.append((t, jid, parsed, "rules"))
         except Exception:
             logger.exception("extract_error", extra={"task_id": t.id})
             fail_and_maybe_requeue(r, "extract", t)
-        finally:
-            db.close()
+
+    for group in pack(pending, settings.extract_microbatch_token_budget, settings.extract_microbatch_max_postings):
+        results: list[ExtractionLLM | None] = [None] * len(group)
+        if len(group) > 1:
+            try:
+                results = run_small_batch([text for _, text in group])
+            except Exception:
+                logger.warning("extract_microbatch_fallback", exc_info=True)
+
+        for ((t, jid, *_), text), parsed in zip(group, results):
+            pre = pres[t.id]
+            try:
+                if parsed is None:
+                    parsed = run_small(text, pre)
+                elif known := known_fields(pre):
+                    parsed = ExtractionLLM.model_validate(merge_known(parsed.model_dump(), known))
+                out.append((t, jid, parsed, "small"))
+            except Exception:
+                logger.exception("extract_error", extra={"task_id": t.id})
+                fail_and_maybe_requeue(r, "extract", t)
+    return out
+
+def flush(done: list[Done]) -> None:
+    # Write everything finished since the last flush in one transaction, then
+    # ack only the tasks whose rows were committed; the rest are retried.
+    try:
+        ok = store_results([(jid, parsed, tier) for _, jid, parsed, tier in done])
+    except Exception:
+        logger.exception("extract_flush_error", extra={"tasks": len(done)})
+        ok = set()
+
+    # Low-confidence answers are upgraded later by the extract_high worker; the
+    # small-model result is already stored, so this never blocks the batch.
+    escalate = [
+        {"job_posting_id": str(jid), "run_id": t.payload.get("run_id")}
+        for t, jid, parsed, _ in done
+        if jid in ok and high_tier_enabled() and needs_escalation(parsed)
+    ]
+    if escalate:
+        enqueue_many(r, "extract_high", escalate)
+
+    for t, jid, _, _ in done:
+        if jid in ok:
+            ack(r, "extract", t)
+        else:
+            fail_and_maybe_requeue(r, "extract", t)
+
+def main():
+    # Keep `extract_concurrency` slots busy at all times: lease only as many
+    # tasks as there are free slots and top up as soon as any slot finishes,
+    # so one slow posting never idles the rest of the pool.
+    #
+    # The DB is touched twice per leased batch rather than per posting: one
+    # prefetch query when tasks are leased, and one transaction per flush of
+    # finished results (up to `extract_write_batch_size`, or
+    # `extract_write_max_delay_sec` after the first result is ready).
+    concurrency = settings.extract_concurrency
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="extract")
+    in_flight: set[Future] = set()
+    done: list[Done] = []
+    flush_at = 0.0
+
+    while True:
+        finished = {f for f in in_flight if f.done()}
+        in_flight -= finished
+        for f in finished:
+            if not done:
+                flush_at = time.monotonic() + settings.extract_write_max_delay_sec
+            done.extend(f.result())
+
+        if done and (len(done) >= settings.extract_write_batch_size or time.monotonic() >= flush_at or not in_flight):
+            flush(done)
+            done = []
+
+        free = concurrency - len(in_flight)
+        if free == 0:
+            timeout = max(0.0, flush_at - time.monotonic()) if done else None
+            wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            continue
+
+        # In micro-batch mode a slot runs a whole group of postings.
+        per_slot = settings.extract_microbatch_max_postings if settings.extract_microbatch_enabled else 1
+        n = min(free * per_slot, settings.extract_batch_size)
+        if in_flight or done:
+            # Work is running: don't park on the queue, so finished slots get
+            # refilled (and their results written) promptly.
+            tasks = lease_batch(r, "extract", n, settings.visibility_timeout_sec)
+        else:
+            tasks = lease_blocking(r, {"extract": n}, visibility_timeout_sec=settings.visibility_timeout_sec, block_timeout_sec=settings.lease_block_timeout_sec)
+
+        work = prefetch(tasks) if tasks else []
+        if per_slot > 1:
+            in_flight.update(pool.submit(extract_group, work[i:i + per_slot]) for i in range(0, len(work), per_slot))
+        else:
+            in_flight.update(pool.submit(extract_one, item) for item in work)
+
+        if not tasks and in_flight:
+            # Queue drained: wait for a running task to finish, re-checking the
+            # queue at least every half second.
+            wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+
+if __name__ == "__main__":
+    main()
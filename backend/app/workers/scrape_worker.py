@@ -1,103 +1,282 @@
 from __future__ import annotations
-import datetime as dt, time
+import datetime as dt
+import uuid
+from sqlalchemy import and_, case, false, func, literal_column, or_, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from app.core.logging import init_logging, get_logger
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.db.models import RawResponse, JobPosting
 from app.db.redis_client import get_redis
-from app.queue.redis_queue import lease_batch, ack, fail_and_maybe_requeue, enqueue
-from app.scraper.greenhouse import fetch_board, fetch_job, job_url
+from app.queue.redis_queue import Task, lease_blocking, ack, fail_and_maybe_requeue, enqueue, enqueue_many
+from app.scraper.engine import FetchResult, ScrapeEngine
+from app.scraper import validators
+from app.scraper.detail import apply_job_detail
+from app.scraper.greenhouse import board_url, job_url
 from app.utils.hashing import sha256_hex
+from app.extract.html_text import html_to_text
+from app.utils import run_stats
 from app.utils.raw_store import store_json
 
 init_logging("worker_scrape")
 logger = get_logger(__name__)
 r = get_redis()
 
-def upsert_job_stub(db: Session, company: str, job_id: int, title: str | None, location: str | None, url: str):
-    existing = db.query(JobPosting).filter(
+def _run_uuid(t: Task) -> uuid.UUID | None:
+    run_id = t.payload.get("run_id")
+    return uuid.UUID(run_id) if run_id else None
+
+# Rows per INSERT statement when upserting a board listing.
+BOARD_UPSERT_CHUNK = 500
+
+def _parse_ts(value: str | None) -> dt.datetime | None:
+    try:
+        return dt.datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+def upsert_board_jobs(db: Session, company: str, jobs: list[dict], run_id: uuid.UUID | None = None, force: bool = False) -> tuple[list, dict[str, tuple[int, int]]]:
+    """
+    Upsert a whole board listing with multi-row INSERT ... ON CONFLICT DO UPDATE.
+
+    Conflicts are resolved on (source, company_name, external_id). Existing
+    rows are only touched when something changed: title, location, URL or
+    the listing's `updated_at`; the description hash for `content=true`
+    entries; or the posting is still waiting to be fetched or extracted.
+    With `force` every row is updated.
+
+    Entries with content get the same treatment as `apply_job_detail`: text,
+    cleaned text and hash are replaced only when the hash changed, and the
+    status becomes "fetched" when the posting needs (re-)extraction.
+
+    Returns:
+        (rows, cleaned): rows (id, external_id, status, inserted) for new or
+        changed postings only, since unchanged postings need no further work;
+        and external_id -> (raw chars, cleaned chars) for every description
+        that was cleaned.
+    """
+    now = dt.datetime.now(dt.timezone.utc)
+    # Hashes we already hold, so unchanged descriptions are neither cleaned
+    # nor sent back to the database.
+    known = dict(db.query(JobPosting.external_id, JobPosting.content_hash).filter(
+        JobPosting.source=="greenhouse",
+        JobPosting.company_name==company,
+    ).all())
+
+    rows: dict[str, dict] = {}
+    cleaned: dict[str, tuple[int, int]] = {}
+    for job in jobs:
+        if job.get("id") is None:
+            continue
+        ext = str(job["id"])
+        text = job.get("content")
+        content_hash = sha256_hex(text) if text else None
+        send_text = bool(text) and (force or known.get(ext) != content_hash)
+        clean = html_to_text(text) if send_text else None
+        if send_text:
+            cleaned[ext] = (len(text), len(clean))
+        rows[ext] = {
+            "id": uuid.uuid4(),
+            "run_id": run_id,
+            "source": "greenhouse",
+            "external_id": ext,
+            "company_name": company,
+            "title": job.get("title"),
+            "location_raw": (job.get("location") or {}).get("name"),
+            "canonical_url": job.get("absolute_url") or job_url(company, int(job["id"])),
+            "source_updated_at": _parse_ts(job.get("updated_at")),
+            "content_hash": content_hash,
+            "description_text": text if send_text else None,
+            "description_clean": clean,
+            "status": "fetched" if text else "discovered",
+            "discovered_at": now,
+            "fetched_at": now if text else None,
+        }
+
+    t = JobPosting.__table__.c
+    out = []
+    values = list(rows.values())
+    for i in range(0, len(values), BOARD_UPSERT_CHUNK):
+        stmt = pg_insert(JobPosting).values(values[i:i + BOARD_UPSERT_CHUNK])
+        ex = stmt.excluded
+        has_content = ex.content_hash.isnot(None)
+        # Only rows that carry their text can replace it (see `known` above).
+        content_changed = and_(
+            ex.description_text.isnot(None),
+            or_(true() if force else false(), t.content_hash.is_distinct_from(ex.content_hash)),
+        )
+        needs_extract = or_(content_changed, and_(has_content, t.status != "extracted"))
+        # Listing fields keep their old value when the listing omits them.
+        listing = {
+            "title": func.coalesce(ex.title, t.title),
+            "location_raw": func.coalesce(ex.location_raw, t.location_raw),
+            "canonical_url": func.coalesce(ex.canonical_url, t.canonical_url),
+            "source_updated_at": func.coalesce(ex.source_updated_at, t.source_updated_at),
+        }
+        changed = or_(
+            *(t[k].is_distinct_from(v) for k, v in listing.items()),
+            needs_extract,
+            t.status == "discovered",
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.source, t.company_name, t.external_id],
+            set_={
+                **listing,
+                "description_text": case((content_changed, ex.description_text), else_=t.description_text),
+                "description_clean": case((content_changed, ex.description_clean), else_=t.description_clean),
+                "content_hash": case((content_changed, ex.content_hash), else_=t.content_hash),
+                "status": case((needs_extract, "fetched"), else_=t.status),
+                "fetched_at": func.coalesce(ex.fetched_at, t.fetched_at),
+            },
+            where=None if force else changed,
+        ).returning(t.id, t.external_id, t.status, literal_column("(xmax = 0)").label("inserted"))
+        out.extend(db.execute(stmt).all())
+    return out, cleaned
+
+def clean_stats(postings: list[JobPosting]) -> dict[str, int]:
+    # Run counters for the HTML-to-text stage (see GET /ingest/runs/{id}/stats).
+    return {
+        "clean_postings": len(postings),
+        "clean_chars_in": sum(len(jp.description_text or "") for jp in postings),
+        "clean_chars_out": sum(len(jp.description_clean or "") for jp in postings),
+    }
+
+def clean_stats_sizes(sizes: list[tuple[int, int]]) -> dict[str, int]:
+    # Same counters from (raw chars, cleaned chars) pairs (bulk board path).
+    return {
+        "clean_postings": len(sizes),
+        "clean_chars_in": sum(n for n, _ in sizes),
+        "clean_chars_out": sum(n for _, n in sizes),
+    }
+
+def task_url(t: Task) -> str:
+    # The single URL a task needs fetched.
+    if t.type == "discover":
+        return board_url(t.payload["company"], content=settings.discover_with_content)
+    return job_url(t.payload["company"], int(t.payload["job_id"]))
+
+def handle_discover(db: Session, t: Task, fetched: FetchResult):
+    company = t.payload["company"]
+    status, data, headers, ctype = fetched
+    if status == 304:
+        # Board unchanged since the last successful pass: nothing to store or fan out.
+        return
+    run_id = _run_uuid(t)
+    force = bool(t.payload.get("force"))
+    url = task_url(t)
+    url_hash = sha256_hex(url)
+    db.add(RawResponse(
+        run_id=run_id,
+        source="greenhouse", url=url, url_hash=url_hash,
+        status_code=status, content_type=ctype,
+        body_ref=store_json(data, url_hash) if data else None,
+        fetched_at=dt.datetime.now(dt.timezone.utc),
+    ))
+    db.commit()
+    if data and "jobs" in data:
+        # The whole listing is upserted in one statement (per 500 postings),
+        # which reports only new or changed postings. With `content=true` the
+        # listing already carries every description, so those go straight to
+        # extraction (1 request per company instead of N+1); entries without
+        # content get a per-job scrape task.
+        jobs = {str(job["id"]): job for job in data["jobs"] if job.get("id") is not None}
+        changed, cleaned_sizes = upsert_board_jobs(db, company, list(jobs.values()), run_id, force)
+        db.commit()
+
+        scrape_payloads = []
+        extract_payloads = []
+        cleaned = []
+        for row in changed:
+            job = jobs[row.external_id]
+            if job.get("content"):
+                if row.status == "fetched":
+                    extract_payloads.append({"job_posting_id": str(row.id), "run_id": t.payload.get("run_id")})
+                    if row.external_id in cleaned_sizes:
+                        cleaned.append(cleaned_sizes[row.external_id])
+            else:
+                scrape_payloads.append({"company": company, "job_id": int(row.external_id), "run_id": t.payload.get("run_id"), "force": force})
+
+        with_content = sum(1 for job in jobs.values() if job.get("content"))
+        enqueue_many(r, "extract", extract_payloads)
+        enqueue_many(r, "scrape", scrape_payloads)
+        run_stats.incr(
+            r, t.payload.get("run_id"),
+            discover_new=sum(1 for row in changed if row.inserted),
+            discover_changed=sum(1 for row in changed if not row.inserted),
+            discover_unchanged=len(jobs) - len(changed),
+            extract_enqueued=len(extract_payloads),
+            extract_skipped=with_content - len(extract_payloads),
+            **clean_stats_sizes(cleaned),
+        )
+    if status == 200:
+        validators.remember(r, url_hash, headers)
+
+def handle_scrape(db: Session, t: Task, fetched: FetchResult):
+    company = t.payload["company"]
+    job_id = int(t.payload["job_id"])
+    status, data, headers, ctype = fetched
+    if status == 304:
+        # Posting unchanged: skip the raw insert, raw-store write and re-extraction.
+        return
+    url = job_url(company, job_id)
+    url_hash = sha256_hex(url)
+    db.add(RawResponse(
+        run_id=_run_uuid(t),
+        source="greenhouse", url=url, url_hash=url_hash,
+        status_code=status, content_type=ctype,
+        body_ref=store_json(data, url_hash) if data else None,
+        fetched_at=dt.datetime.now(dt.timezone.utc),
+    ))
+    jp = db.query(JobPosting).filter(
         JobPosting.source=="greenhouse",
         JobPosting.external_id==str(job_id),
-        JobPosting.company_name==company
+        JobPosting.company_name==company,
     ).first()
-    if existing:
-        return existing
-    jp = JobPosting(
-        source="greenhouse",
-        external_id=str(job_id),
-        company_name=company,
-        title=title,
-        location_raw=location,
-        canonical_url=url,
-        status="discovered",
-        discovered_at=dt.datetime.now(dt.timezone.utc),
-    )
-    db.add(jp); db.commit()
-    return jp
-
-while True:
-    tasks = lease_batch(r, "discover", batch_size=16, visibility_timeout_sec=settings.visibility_timeout_sec)
-    if not tasks:
-        tasks = lease_batch(r, "scrape", batch_size=32, visibility_timeout_sec=settings.visibility_timeout_sec)
-        if not tasks:
-            time.sleep(0.5); continue
-
-    for t in tasks:
-        db = SessionLocal()
-        try:
-            if t.type == "discover":
-                company = t.payload["company"]
-                status, data, headers, ctype = fetch_board(company)
-                url = f"https://boards-api.greenhouse.io/v1/boards/{company}/jobs"
-                url_hash = sha256_hex(url)
-                db.add(RawResponse(
-                    source="greenhouse", url=url, url_hash=url_hash,
-                    status_code=status, content_type=ctype, body=data,
-                    fetched_at=dt.datetime.now(dt.timezone.utc),
-                ))
-                db.commit()
-                if data and "jobs" in data:
-                    for job in data["jobs"]:
-                        jid = job.get("id")
-                        title = job.get("title")
-                        loc = (job.get("location") or {}).get("name")
-                        upsert_job_stub(db, company, jid, title, loc, job_url(company, jid))
-                        enqueue(r, "scrape", {"company": company, "job_id": jid})
-                ack(r, "discover", t)
-
-            elif t.type == "scrape":
-                company = t.payload["company"]
-                job_id = int(t.payload["job_id"])
-                status, data, headers, ctype = fetch_job(company, job_id)
-                url = job_url(company, job_id)
-                url_hash = sha256_hex(url)
-                db.add(RawResponse(
-                    source="greenhouse", url=url, url_hash=url_hash,
-                    status_code=status, content_type=ctype, body=data,
-                    fetched_at=dt.datetime.now(dt.timezone.utc),
-                ))
-                jp = db.query(JobPosting).filter(
-                    JobPosting.source=="greenhouse",
-                    JobPosting.external_id==str(job_id),
-                    JobPosting.company_name==company,
-                ).first()
-                if jp and data:
-                    jp.description_text = data.get("content") or ""
-                    jp.title = data.get("title") or jp.title
-                    loc = (data.get("location") or {}).get("name")
-                    jp.location_raw = loc or jp.location_raw
-                    jp.canonical_url = data.get("absolute_url") or jp.canonical_url
-                    jp.status = "fetched"
-                    jp.fetched_at = dt.datetime.now(dt.timezone.utc)
-                    enqueue(r, "extract", {"job_posting_id": str(jp.id)})
-                db.commit()
-                if data:
-                    store_json(url_hash, data)
-                ack(r, "scrape", t)
-
-        except Exception:
-            logger.exception("task_error", extra={"task_type": t.type, "task_id": t.id})
-            fail_and_maybe_requeue(r, t.type, t)
-        finally:
-            db.close()
+    if jp and data:
+        if apply_job_detail(jp, data, bool(t.payload.get("force"))):
+            enqueue(r, "extract", {"job_posting_id": str(jp.id), "run_id": t.payload.get("run_id")})
+            run_stats.incr(r, t.payload.get("run_id"), extract_enqueued=1, **clean_stats([jp]))
+        else:
+            run_stats.incr(r, t.payload.get("run_id"), extract_skipped=1)
+    db.commit()
+    if status == 200:
+        validators.remember(r, url_hash, headers)
+
+HANDLERS = {"discover": handle_discover, "scrape": handle_scrape}
+
+def main():
+    engine = ScrapeEngine(settings.scrape_concurrency, settings.scrape_per_host_concurrency)
+    try:
+        while True:
+            # Discovery first (it fans out scrape work), then scrape.
+            tasks = lease_blocking(r, {"discover": 16, "scrape": 32}, visibility_timeout_sec=settings.visibility_timeout_sec, block_timeout_sec=settings.lease_block_timeout_sec)
+            if not tasks:
+                continue
+
+            # Fetch the whole batch concurrently (conditionally, when we hold
+            # validators from a previous pass), then persist each result on its
+            # own session so one bad posting only fails its own task.
+            urls = [task_url(t) for t in tasks]
+            cond = validators.conditional_headers_many(r, [sha256_hex(u) for u in urls])
+            # A forced re-crawl must not be short-circuited by a 304.
+            cond = [None if t.payload.get("force") else h for t, h in zip(tasks, cond)]
+            results = engine.fetch_all(urls, cond)
+
+            for t, fetched in zip(tasks, results):
+                db = SessionLocal()
+                try:
+                    if isinstance(fetched, BaseException):
+                        raise fetched
+                    HANDLERS[t.type](db, t, fetched)
+                    ack(r, t.type, t)
+                except Exception:
+                    logger.exception("task_error", extra={"task_type": t.type, "task_id": t.id})
+                    fail_and_maybe_requeue(r, t.type, t)
+                finally:
+                    db.close()
+    finally:
+        engine.close()
+
+if __name__ == "__main__":
+    main()
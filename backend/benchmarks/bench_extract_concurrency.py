@@ -0,0 +1,98 @@
+"""
+Throughput benchmark for the extract worker's LLM stage.
+
+Starts a fake Ollama `/api/generate` server that answers with a valid
+extraction after a configurable latency, then runs the small-model step
+(`run_small`) over N postings:
+
+- sequential: one posting at a time (the previous worker loop)
+- pool:       a thread pool at EXTRACT_CONCURRENCY (the current worker)
+
+and reports postings/min for each. The LLM response cache is disabled so every
+posting pays for a model call.
+
+Usage (from backend/):
+    python -m benchmarks.bench_extract_concurrency --postings 64 --latency-ms 800 --concurrency 8
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = {
+    "summary": "Build backend services.",
+    "role_function": "engineering",
+    "seniority": "senior",
+    "location_city": "San Francisco",
+    "location_state": "CA",
+    "location_country": "US",
+    "salary_min": 150000,
+    "salary_max": 200000,
+    "salary_currency": "USD",
+    "skills": ["python", "postgres", "k8s"],
+}
+
+
+def _fake_ollama(latency_sec: float) -> ThreadingHTTPServer:
+    body = json.dumps({"response": "Here you go:\n" + json.dumps(ANSWER), "done": True}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("content-length", 0)))
+            time.sleep(latency_sec)
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--postings", type=int, default=64)
+    ap.add_argument("--latency-ms", type=float, default=800)
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    srv = _fake_ollama(args.latency_ms / 1000)
+
+    # Settings are read at import time, so point them at the fake server first.
+    os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{srv.server_address[1]}"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    from app.extract.pipeline import run_small
+
+    texts = [f"Senior Backend Engineer #{i}. Python, Postgres, Kubernetes." for i in range(args.postings)]
+
+    t0 = time.perf_counter()
+    for text in texts:
+        run_small(text)
+    seq = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run_small, texts))
+    par = time.perf_counter() - t0
+
+    srv.shutdown()
+
+    print(f"postings={args.postings} latency={args.latency_ms:.0f}ms concurrency={args.concurrency}")
+    print(f"sequential  {args.postings / seq * 60:>9.1f} postings/min")
+    print(f"pool        {args.postings / par * 60:>9.1f} postings/min  ({seq / par:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark for `app.extract.parse.extract_json`.
+
+Builds a corpus of realistic small-model outputs (bare JSON, markdown fences,
+chatty preambles, trailing prose containing braces, trailing commas, Python
+literals, long descriptions) and compares the greedy-regex extractor the
+worker used before against the current single-pass scanner: success rate and
+microseconds per call.
+
+Usage (from backend/):
+    python -m benchmarks.bench_json_extract --n 20000
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import time
+from app.extract.parse import extract_json
+
+
+def legacy_extract_json(text: str) -> dict:
+    # The previous implementation: first `{` to last `}`.
+    m = re.search(r"\{.*\}", text.strip(), flags=re.DOTALL)
+    if not m:
+        raise ValueError("No JSON object found")
+    return json.loads(m.group(0))
+
+
+SKILLS = ["python", "go", "kubernetes", "postgres", "react", "aws", "terraform", "kafka", "spark", "sql"]
+
+
+def _answer(rng: random.Random) -> dict:
+    return {
+        "summary": "Own backend services for the payments team. " * rng.randint(1, 6),
+        "role_function": rng.choice(["engineering", "data", "sales", "product"]),
+        "seniority": rng.choice(["junior", "mid", "senior", None]),
+        "location_city": rng.choice(["San Francisco", "New York", None]),
+        "location_state": None,
+        "location_country": "US",
+        "salary_min": rng.choice([None, 120000]),
+        "salary_max": rng.choice([None, 180000]),
+        "salary_currency": "USD",
+        "skills": rng.sample(SKILLS, rng.randint(2, 8)),
+    }
+
+
+def _render(rng: random.Random) -> str:
+    body = json.dumps(_answer(rng), indent=rng.choice([None, 2]))
+    kind = rng.randrange(6)
+    if kind == 0:
+        return body
+    if kind == 1:
+        return f"```json\n{body}\n```"
+    if kind == 2:
+        return f"Here is the extracted data:\n{body}\nLet me know if you need anything else."
+    if kind == 3:
+        return f"{body}\n\nNote: fields like {{salary}} were inferred from the {{comp}} section."
+    if kind == 4:
+        return body.replace("]", ",]", 1).replace("\n}", ",\n}")
+    return body.replace("null", "None")
+
+
+def _bench(fn, corpus: list[str]) -> tuple[float, float]:
+    ok = 0
+    t0 = time.perf_counter()
+    for text in corpus:
+        try:
+            fn(text)
+            ok += 1
+        except Exception:
+            pass
+    elapsed = time.perf_counter() - t0
+    return ok / len(corpus), elapsed / len(corpus) * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [_render(rng) for _ in range(args.n)]
+
+    for name, fn in (("legacy regex", legacy_extract_json), ("scanner", extract_json)):
+        rate, us = _bench(fn, corpus)
+        print(f"{name:<13} parsed {rate:6.1%}  {us:7.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Full-replay read benchmark for the raw archive backends.
+
+Writes N synthetic Greenhouse job bodies to a temporary raw store with each
+backend, then reads everything back (with --cold, as root, the page cache is
+dropped first):
+
+- blobs:    one `load_json(ref)` per record (one file open per body)
+- segments: `raw_segments.scan()` over the rolling segment files
+
+Usage (from backend/):
+    python -m benchmarks.bench_raw_replay --n 20000
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import orjson
+from app.core.config import settings
+from app.utils import raw_segments, raw_store
+
+
+def _body(rng: random.Random, i: int) -> dict:
+    words = ["python", "kubernetes", "customers", "pipeline", "team", "ownership", "latency", "growth"]
+    return {
+        "id": i,
+        "title": f"Engineer {i}",
+        "location": {"name": "Remote - US"},
+        "content": " ".join(rng.choice(words) for _ in range(rng.randint(300, 1500))),
+    }
+
+
+def _drop_caches() -> None:
+    subprocess.run(["sync"], check=False)
+    try:
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+    except OSError:
+        pass
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--cold", action="store_true", help="drop the page cache before each read phase")
+    args = ap.parse_args()
+
+    rng = random.Random(11)
+    bodies = [_body(rng, i) for i in range(args.n)]
+    root = tempfile.mkdtemp(prefix="bench-raw-")
+    settings.raw_store_dir = root
+    try:
+        results = {}
+        for backend in ("blobs", "segments"):
+            settings.raw_store_backend = backend
+            t0 = time.perf_counter()
+            refs = [raw_store.store_json(b, f"{i:064x}") for i, b in enumerate(bodies)]
+            write = time.perf_counter() - t0
+            if raw_segments._writer is not None:
+                raw_segments._writer.close()
+
+            if args.cold:
+                _drop_caches()
+            t0 = time.perf_counter()
+            if backend == "blobs":
+                n = sum(1 for ref in refs if raw_store.load_json(ref))
+            else:
+                n = sum(1 for _, body in raw_segments.scan() if orjson.loads(body))
+            read = time.perf_counter() - t0
+            assert n == args.n
+
+            files = sum(len(fs) for _, _, fs in os.walk(os.path.join(root, backend if backend == "segments" else "blobs")))
+            results[backend] = (write, read, files)
+
+        for backend, (write, read, files) in results.items():
+            print(f"{backend:<9} files={files:<7} write {args.n / write:>10,.0f} rec/s   replay {args.n / read:>10,.0f} rec/s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
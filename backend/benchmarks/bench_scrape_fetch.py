@@ -0,0 +1,83 @@
+"""
+Batch wall-time benchmark for the scrape fetch stage.
+
+Serves fake Greenhouse job JSON from a local stub HTTP server with a fixed
+per-request latency, then fetches one leased batch worth of URLs:
+
+- sequential: one blocking `fetch_json` call per task (the previous worker loop)
+- engine:     `ScrapeEngine.fetch_all` at the configured concurrency
+
+Usage (from backend/):
+    python -m benchmarks.bench_scrape_fetch --batch 32 --latency-ms 150 --concurrency 8
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.scraper.engine import ScrapeEngine
+from app.scraper.http import fetch_json
+
+
+def _stub_server(latency_sec: float) -> ThreadingHTTPServer:
+    body = json.dumps({"id": 1, "title": "Engineer", "content": "x" * 4000}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency_sec)
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--latency-ms", type=float, default=150)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--per-host", type=int, default=8)
+    ap.add_argument("--rounds", type=int, default=3)
+    args = ap.parse_args()
+
+    srv = _stub_server(args.latency_ms / 1000)
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    urls = [f"{base}/v1/boards/bench/jobs/{i}" for i in range(args.batch)]
+
+    t0 = time.perf_counter()
+    for _ in range(args.rounds):
+        for u in urls:
+            fetch_json(u)
+    seq = (time.perf_counter() - t0) / args.rounds
+
+    engine = ScrapeEngine(args.concurrency, args.per_host)
+    try:
+        engine.fetch_all(urls[:1])  # warm the pool
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            results = engine.fetch_all(urls)
+            assert all(not isinstance(x, BaseException) and x[0] == 200 for x in results)
+        eng = (time.perf_counter() - t0) / args.rounds
+    finally:
+        engine.close()
+        srv.shutdown()
+
+    print(f"batch={args.batch} latency={args.latency_ms:.0f}ms concurrency={args.concurrency}")
+    print(f"sequential  {seq * 1000:>9.1f} ms/batch")
+    print(f"engine      {eng * 1000:>9.1f} ms/batch  ({seq / eng:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()